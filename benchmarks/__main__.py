@@ -0,0 +1,258 @@
+import io
+import sys
+import json
+import time
+import functools
+import platform
+import argparse
+import tracemalloc
+import typing
+
+import mnllib
+
+from .corpus import (
+    make_compression_corpora,
+    make_language_table,
+    make_script_manager,
+    make_subroutine,
+)
+
+
+class Benchmark(typing.NamedTuple):
+    name: str
+    function: typing.Callable[[], typing.Any]
+    input_size: int
+    reports_ratio: bool = False
+
+
+def make_benchmarks(size: int, seed: int) -> list[Benchmark]:
+    benchmarks: list[Benchmark] = []
+
+    for corpus_name, data in make_compression_corpora(size, seed).items():
+        for level in [
+            mnllib.COMPRESSION_LEVEL_FAST,
+            mnllib.COMPRESSION_LEVEL_DEFAULT,
+            mnllib.COMPRESSION_LEVEL_MAX,
+        ]:
+            benchmarks.append(
+                Benchmark(
+                    f"compress[{corpus_name}-{level}]",
+                    functools.partial(mnllib.compress, data, level),
+                    len(data),
+                    reports_ratio=True,
+                )
+            )
+        benchmarks.append(
+            Benchmark(
+                f"decompress[{corpus_name}]",
+                functools.partial(decompress_bytes, mnllib.compress(data)),
+                len(data),
+            )
+        )
+
+    values = list(range(0, 1 << 24, 997))
+    encoded_values = b"".join(mnllib.encode_varint(value) for value in values)
+    benchmarks.append(
+        Benchmark(
+            "encode_varint",
+            lambda: [mnllib.encode_varint(value) for value in values],
+            len(encoded_values),
+        )
+    )
+
+    def decode_varints() -> None:
+        stream = io.BytesIO(encoded_values)
+        for _ in values:
+            mnllib.decode_varint(stream)
+
+    benchmarks.append(Benchmark("decode_varint", decode_varints, len(encoded_values)))
+
+    manager = make_script_manager(seed)
+    subroutine_raw = make_subroutine(manager, size, seed).to_bytes(manager)
+    benchmarks.append(
+        Benchmark(
+            "parse_subroutine",
+            lambda: mnllib.Subroutine.from_stream(manager, io.BytesIO(subroutine_raw)),
+            len(subroutine_raw),
+        )
+    )
+    subroutine = mnllib.Subroutine.from_stream(manager, io.BytesIO(subroutine_raw))
+    benchmarks.append(
+        Benchmark(
+            "serialize_subroutine",
+            lambda: subroutine.to_bytes(manager),
+            len(subroutine_raw),
+        )
+    )
+
+    language_table_raw = make_language_table(size, seed).to_bytes()
+    benchmarks.append(
+        Benchmark(
+            "parse_language_table",
+            lambda: mnllib.LanguageTable.from_bytes(language_table_raw, False),
+            len(language_table_raw),
+        )
+    )
+    language_table = mnllib.LanguageTable.from_bytes(language_table_raw, False)
+    benchmarks.append(
+        Benchmark(
+            "serialize_language_table",
+            lambda: language_table.to_bytes(),
+            len(language_table_raw),
+        )
+    )
+
+    return benchmarks
+
+
+def decompress_bytes(data: bytes) -> bytes:
+    return mnllib.decompress(io.BytesIO(data))
+
+
+def run_benchmark(benchmark: Benchmark, repeat: int) -> dict[str, float | int]:
+    times: list[float] = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        benchmark.function()
+        times.append(time.perf_counter() - start_time)
+    best_time = min(times)
+
+    tracemalloc.start()
+    try:
+        output = benchmark.function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result: dict[str, float | int] = {
+        "seconds": best_time,
+        "mb_per_s": benchmark.input_size / best_time / 1_000_000,
+        "input_size": benchmark.input_size,
+        "peak_memory": peak_memory,
+    }
+    if benchmark.reports_ratio:
+        result["output_size"] = len(output)
+        result["ratio"] = len(output) / benchmark.input_size
+    return result
+
+
+def compare_results(
+    results: dict[str, dict[str, float | int]],
+    baseline: dict[str, dict[str, float | int]],
+    threshold: float,
+) -> list[str]:
+    regressions: list[str] = []
+    for name, result in results.items():
+        baseline_result = baseline.get(name)
+        if baseline_result is None:
+            continue
+        speed_change = result["mb_per_s"] / baseline_result["mb_per_s"] - 1
+        line = f"{name}: {speed_change:+.1%} MB/s"
+        if "ratio" in result and "ratio" in baseline_result:
+            ratio_change = result["ratio"] / baseline_result["ratio"] - 1
+            line += f", {ratio_change:+.2%} ratio"
+            if ratio_change > 0:
+                regressions.append(f"{name}: ratio {ratio_change:+.2%}")
+        if speed_change < -threshold:
+            regressions.append(f"{name}: speed {speed_change:+.1%}")
+        print(line)
+    return regressions
+
+
+def compare_levels(
+    results: dict[str, dict[str, float | int]], threshold: float
+) -> list[str]:
+    # COMPRESSION_LEVEL_FAST trades ratio for speed, so it must not be slower than
+    # COMPRESSION_LEVEL_DEFAULT on any corpus.
+    regressions: list[str] = []
+    for name, result in results.items():
+        if not name.endswith(f"-{mnllib.COMPRESSION_LEVEL_FAST}]"):
+            continue
+        default_result = results.get(
+            f"{name.rpartition("-")[0]}-{mnllib.COMPRESSION_LEVEL_DEFAULT}]"
+        )
+        if default_result is None:
+            continue
+        speed_change = result["mb_per_s"] / default_result["mb_per_s"] - 1
+        if speed_change < -threshold:
+            regressions.append(f"{name}: {speed_change:+.1%} MB/s vs default level")
+    return regressions
+
+
+def main() -> None:
+    argp = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark mnllib on synthetic data.",
+    )
+    argp.add_argument("-o", "--output", help="write the results as JSON to this file")
+    argp.add_argument(
+        "-c",
+        "--compare",
+        help="compare the results against a JSON file written by --output",
+    )
+    argp.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="slowdown (as a fraction) that counts as a regression "
+        "(default: %(default)s)",
+    )
+    argp.add_argument(
+        "-s",
+        "--size",
+        type=int,
+        default=32 * 1024,
+        help="size of each corpus in bytes (default: %(default)s)",
+    )
+    argp.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=3,
+        help="number of timed runs per benchmark (default: %(default)s)",
+    )
+    argp.add_argument("--seed", type=int, default=0)
+    argp.add_argument(
+        "-k", "--filter", help="only run benchmarks whose name contains this"
+    )
+    args = argp.parse_args()
+
+    results: dict[str, dict[str, float | int]] = {}
+    for benchmark in make_benchmarks(args.size, args.seed):
+        if args.filter is not None and args.filter not in benchmark.name:
+            continue
+        result = run_benchmark(benchmark, args.repeat)
+        results[benchmark.name] = result
+        print(
+            f"{benchmark.name:32} {result["mb_per_s"]:9.3f} MB/s"
+            f"{f"  ratio {result["ratio"]:.4f}" if "ratio" in result else "":15}"
+            f"  peak {result["peak_memory"] / 1024:9.1f} KiB"
+        )
+
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "size": args.size,
+                    "seed": args.seed,
+                    "results": results,
+                },
+                file,
+                indent=2,
+            )
+
+    regressions = compare_levels(results, args.threshold)
+    if args.compare is not None:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        print()
+        regressions += compare_results(results, baseline["results"], args.threshold)
+    if len(regressions) > 0:
+        print("\nRegressions:", *regressions, sep="\n  ")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
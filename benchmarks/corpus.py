@@ -0,0 +1,109 @@
+import random
+
+import mnllib
+
+
+def make_random_bytes(size: int, seed: int = 0) -> bytes:
+    return random.Random(seed).randbytes(size)
+
+
+def make_long_runs(size: int, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    data = bytearray()
+    while len(data) < size:
+        data += bytes([rng.choice(b"\x00\x00\x00\xff\x01")]) * rng.randint(8, 300)
+        data += rng.randbytes(rng.randint(0, 8))
+    return bytes(data[:size])
+
+
+def make_command_parameter_metadata_table(
+    number_of_commands: int = 0x100, seed: int = 0
+) -> list[mnllib.CommandParameterMetadata]:
+    rng = random.Random(seed)
+    return [
+        mnllib.CommandParameterMetadata(
+            rng.random() < 0.3,
+            [
+                rng.randrange(len(mnllib.COMMAND_PARAMETER_STRUCT_MAP))
+                for _ in range(rng.choice([0, 1, 1, 2, 2, 3, 4, 6]))
+            ],
+        )
+        for _ in range(number_of_commands)
+    ]
+
+
+def make_script_manager(seed: int = 0) -> mnllib.FEventScriptManager:
+    manager = mnllib.FEventScriptManager(load=False)
+    manager.command_parameter_metadata_table = make_command_parameter_metadata_table(
+        seed=seed
+    )
+    return manager
+
+
+def make_subroutine(
+    manager: mnllib.MnLScriptManager, size: int, seed: int = 0
+) -> mnllib.Subroutine:
+    rng = random.Random(seed)
+    table = manager.command_parameter_metadata_table
+    # Real scripts reuse a small set of commands with mostly small arguments.
+    common_command_ids = rng.sample(range(len(table)), 24)
+    commands: list[mnllib.Command] = []
+    current_size = 0
+    while current_size < size:
+        command_id = rng.choice(common_command_ids)
+        param_metadata = table[command_id]
+        arguments: list[int | mnllib.Variable] = []
+        for param_type in param_metadata.parameter_types:
+            if rng.random() < 0.15:
+                arguments.append(mnllib.Variable(rng.randrange(0x1000, 0x1100)))
+                continue
+            parameter_struct = mnllib.COMMAND_PARAMETER_STRUCT_MAP[param_type]
+            bits = parameter_struct.size * 8
+            if parameter_struct.format[-1].islower():
+                arguments.append(rng.randint(-(1 << (bits - 1)), (1 << (bits - 1)) - 1))
+            else:
+                arguments.append(rng.choice([0, 1, rng.randrange(1 << bits)]))
+        command = mnllib.Command(
+            command_id,
+            arguments,
+            (
+                mnllib.Variable(rng.randrange(0x1000, 0x1100))
+                if param_metadata.has_return_value
+                else None
+            ),
+        )
+        commands.append(command)
+        current_size += len(command.to_bytes(manager))
+    return mnllib.Subroutine(commands)
+
+
+def make_language_table(size: int, seed: int = 0) -> mnllib.LanguageTable:
+    rng = random.Random(seed)
+    words = [
+        bytes(
+            rng.choice(b"abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 9))
+        )
+        for _ in range(200)
+    ]
+    text_tables: list[mnllib.TextTable | bytes | None] = []
+    current_size = 0
+    while current_size < size:
+        entries = [
+            b" ".join(rng.choice(words) for _ in range(rng.randint(1, 12))) + b"\xff"
+            for _ in range(rng.randint(10, 60))
+        ]
+        text_table = mnllib.TextTable(entries, False)
+        text_tables.append(text_table)
+        current_size += len(text_table.to_bytes())
+    text_tables.append(None)
+    return mnllib.LanguageTable(text_tables)
+
+
+def make_compression_corpora(size: int, seed: int = 0) -> dict[str, bytes]:
+    manager = make_script_manager(seed)
+    return {
+        "random": make_random_bytes(size, seed),
+        "runs": make_long_runs(size, seed),
+        "script": make_subroutine(manager, size, seed).to_bytes(manager)[:size],
+        "text": make_language_table(size, seed).to_bytes()[:size],
+    }
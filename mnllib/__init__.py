@@ -2,6 +2,8 @@ from .compression import *
 from .consts import *
 from .managers import *
 from .misc import *
+from .project import *
 from .script import *
+from .state import *
 from .text import *
 from .utils import *
@@ -0,0 +1,234 @@
+import os
+import sys
+import glob
+import time
+import pathlib
+import argparse
+import concurrent.futures
+import typing
+
+from .compression import CompressionCache, compress, decompress
+from .consts import (
+    COMPRESSION_LEVEL_DEFAULT,
+    COMPRESSION_LEVEL_FAST,
+    COMPRESSION_LEVEL_MAX,
+)
+
+
+DECOMPRESSED_SUFFIX = ".dec"
+
+_worker_cache: CompressionCache | None = None
+
+
+class _Job(typing.NamedTuple):
+    input_path: pathlib.Path
+    output_path: pathlib.Path
+
+
+def _decompressed_name(name: str) -> str:
+    stem, ext = os.path.splitext(name)
+    return f"{stem}{DECOMPRESSED_SUFFIX}{ext}"
+
+
+def _compressed_name(name: str) -> str:
+    stem, ext = os.path.splitext(name)
+    return f"{stem.removesuffix(DECOMPRESSED_SUFFIX)}{ext}"
+
+
+def _find_jobs(
+    inputs: list[str], output_directory: pathlib.Path | None, decompressing: bool
+) -> list[_Job]:
+    convert_name = _decompressed_name if decompressing else _compressed_name
+
+    jobs: list[_Job] = []
+    for input_ in inputs:
+        input_path = pathlib.Path(input_)
+        job_output_directory: pathlib.Path | None
+        if input_path.is_dir():
+            if output_directory is not None:
+                job_output_directory = output_directory
+            elif decompressing:
+                job_output_directory = input_path.with_name(
+                    input_path.name + DECOMPRESSED_SUFFIX
+                )
+            elif input_path.name.endswith(DECOMPRESSED_SUFFIX):
+                job_output_directory = input_path.with_name(
+                    input_path.name.removesuffix(DECOMPRESSED_SUFFIX)
+                )
+            else:
+                raise ValueError(
+                    f"cannot derive an output directory for '{input_}', "
+                    "use -o/--output"
+                )
+            input_paths = sorted(
+                path for path in input_path.iterdir() if path.is_file()
+            )
+        else:
+            job_output_directory = output_directory
+            if input_path.exists():
+                input_paths = [input_path]
+            else:
+                input_paths = sorted(
+                    pathlib.Path(path)
+                    for path in glob.glob(input_, recursive=True)
+                    if os.path.isfile(path)
+                )
+                if len(input_paths) <= 0:
+                    raise ValueError(f"no files match '{input_}'")
+
+        for path in input_paths:
+            output_path = (
+                job_output_directory
+                if job_output_directory is not None
+                else path.parent
+            ) / convert_name(path.name)
+            if output_path == path:
+                raise ValueError(f"the output for '{path}' would overwrite it")
+            jobs.append(_Job(path, output_path))
+    return jobs
+
+
+def _is_up_to_date(job: _Job) -> bool:
+    try:
+        output_mtime = job.output_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return False
+    return output_mtime >= job.input_path.stat().st_mtime_ns
+
+
+def _positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {value}")
+    return number
+
+
+def _init_worker(cache_directory: pathlib.Path | None) -> None:
+    global _worker_cache
+
+    # Scanning the cache directory stats every entry, so each worker process
+    # does it once instead of once per file.
+    if cache_directory is not None:
+        _worker_cache = CompressionCache(directory=cache_directory)
+
+
+def _run_job(job: _Job, decompressing: bool, level: int) -> tuple[int, int, float]:
+    start_time = time.perf_counter()
+    with job.input_path.open("rb") as file:
+        if decompressing:
+            input_size = os.fstat(file.fileno()).st_size
+            data = decompress(file)
+        else:
+            uncompressed_data = file.read()
+            input_size = len(uncompressed_data)
+            data = compress(uncompressed_data, level, cache=_worker_cache)
+
+    job.output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = job.output_path.with_name(f"{job.output_path.name}.{os.getpid()}.tmp")
+    try:
+        with temp_path.open("wb") as file:
+            file.write(data)
+        os.replace(temp_path, job.output_path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+    return input_size, len(data), time.perf_counter() - start_time
+
+
+def main(args: typing.Sequence[str] | None = None) -> None:
+    argp = argparse.ArgumentParser(
+        prog="mnllib",
+        description="Compress or decompress files in the Mario & Luigi format.",
+    )
+    argp.add_argument("mode", choices=["compress", "decompress"])
+    argp.add_argument(
+        "inputs",
+        nargs="+",
+        help="files, directories or glob patterns to process; "
+        f"directories are written to a sibling with '{DECOMPRESSED_SUFFIX}' "
+        "added to or removed from their name",
+    )
+    argp.add_argument("-o", "--output", help="write all outputs to this directory")
+    argp.add_argument(
+        "-j",
+        "--jobs",
+        type=_positive_int,
+        help="number of worker processes (default: the number of CPUs)",
+    )
+    argp.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="also process files whose output is newer than the input",
+    )
+    argp.add_argument(
+        "-l",
+        "--level",
+        type=int,
+        choices=(
+            COMPRESSION_LEVEL_FAST,
+            COMPRESSION_LEVEL_DEFAULT,
+            COMPRESSION_LEVEL_MAX,
+        ),
+        default=COMPRESSION_LEVEL_DEFAULT,
+        help="compression level (default: %(default)s)",
+    )
+    argp.add_argument("--cache", help="directory for the compressed block cache")
+    parsed_args = argp.parse_args(args)
+
+    decompressing = parsed_args.mode == "decompress"
+    try:
+        jobs = _find_jobs(
+            parsed_args.inputs,
+            (
+                pathlib.Path(parsed_args.output)
+                if parsed_args.output is not None
+                else None
+            ),
+            decompressing,
+        )
+    except ValueError as e:
+        argp.error(str(e))
+    pending_jobs = [job for job in jobs if parsed_args.force or not _is_up_to_date(job)]
+    cache_directory = (
+        pathlib.Path(parsed_args.cache)
+        if parsed_args.cache is not None and not decompressing
+        else None
+    )
+
+    start_time = time.perf_counter()
+    total_input_size = 0
+    total_output_size = 0
+    failed = 0
+    with concurrent.futures.ProcessPoolExecutor(
+        parsed_args.jobs, initializer=_init_worker, initargs=(cache_directory,)
+    ) as executor:
+        futures = {
+            executor.submit(_run_job, job, decompressing, parsed_args.level): job
+            for job in pending_jobs
+        }
+        for future in concurrent.futures.as_completed(futures):
+            job = futures[future]
+            try:
+                input_size, output_size, seconds = future.result()
+            except Exception as e:
+                print(f"{job.input_path}: error: {e}", file=sys.stderr)
+                failed += 1
+                continue
+            total_input_size += input_size
+            total_output_size += output_size
+            print(
+                f"{job.input_path} -> {job.output_path}: "
+                f"{input_size} -> {output_size} bytes in {seconds:.3f}s"
+            )
+
+    print(
+        f"{len(pending_jobs) - failed} processed, "
+        f"{len(jobs) - len(pending_jobs)} up to date, {failed} failed; "
+        f"{total_input_size} -> {total_output_size} bytes "
+        f"in {time.perf_counter() - start_time:.3f}s"
+    )
+    if failed > 0:
+        sys.exit(1)
@@ -1,164 +1,945 @@
 import os
+import io
 import math
+import bisect
 import struct
-import io
+import hashlib
+import pathlib
 import warnings
+import itertools
+import collections
+import collections.abc
+import concurrent.futures
 import typing
 
+from .consts import (
+    COMPRESSION_LEVEL_DEFAULT,
+    COMPRESSION_LEVEL_FAST,
+    COMPRESSION_LEVEL_MAX,
+)
 from .misc import MnLLibWarning, decode_varint, encode_varint
 
+_BLOCK_SIZE_STRUCT = struct.Struct("<H")
+_WINDOW_BLOCKS = math.ceil(0xFFF / 512)
+_MIN_BLOCKS_PER_RANGE = 16
+_BLOCK_CACHE_KEY_VERSION = 1
+_MAX_COMMANDS_GROUP_OUTPUT_SIZE = 4 * 257
+_BLOCK_PADDING = bytes(512 + _MAX_COMMANDS_GROUP_OUTPUT_SIZE)
+_RLE_BYTES = [bytes([x]) for x in range(256)]
 
-def decompress(stream: typing.BinaryIO) -> bytes:
-    result = io.BytesIO()
 
+def _build_commands_groups() -> list[tuple[tuple[int, ...], bool]]:
+    commands_groups: list[tuple[tuple[int, ...], bool]] = []
+    for commands_byte in range(256):
+        commands: list[int] = []
+        for command_number in range(4):
+            current_command = (commands_byte >> (command_number * 2)) & 0x03
+            if current_command == 0:
+                break
+            commands.append(current_command)
+        commands_groups.append((tuple(commands), len(commands) < 4))
+    return commands_groups
+
+
+_COMMANDS_GROUPS = _build_commands_groups()
+
+
+def _decompress_block(
+    data: memoryview, position: int, result: bytearray, result_position: int
+) -> tuple[int, int]:
+    for _ in range(256):
+        if result_position + _MAX_COMMANDS_GROUP_OUTPUT_SIZE > len(result):
+            result.extend(
+                bytes(result_position + _MAX_COMMANDS_GROUP_OUTPUT_SIZE - len(result))
+            )
+        commands_byte = data[position]
+        position += 1
+        if commands_byte == 0x55:
+            result[result_position : result_position + 4] = data[
+                position : position + 4
+            ]
+            position += 4
+            result_position += 4
+            continue
+
+        commands, is_last_group = _COMMANDS_GROUPS[commands_byte]
+        for current_command in commands:
+            if current_command == 1:
+                result[result_position] = data[position]
+                position += 1
+                result_position += 1
+            elif current_command == 2:
+                data2 = data[position + 1]
+                offset = data[position] | ((data2 & 0xF0) << 4)
+                length = (data2 & 0x0F) + 2
+                position += 2
+                source_position = result_position - offset
+                if source_position < 0:
+                    raise ValueError(
+                        f"back-reference (offset {offset}) before the start of "
+                        f"the data (at {result_position})"
+                    )
+                if offset >= length:
+                    result[result_position : result_position + length] = result[
+                        source_position : source_position + length
+                    ]
+                else:
+                    for i in range(length):
+                        result[result_position + i] = result[source_position + i]
+                result_position += length
+            else:
+                count = data[position] + 2
+                result[result_position : result_position + count] = (
+                    _RLE_BYTES[data[position + 1]] * count
+                )
+                position += 2
+                result_position += count
+        if is_last_group:
+            return position, result_position
+    return position, result_position
+
+
+def decompress(stream: typing.BinaryIO) -> bytes:
     uncompressed_size = decode_varint(stream)
     num_blocks = decode_varint(stream) + 1
 
+    data_start = stream.tell()
+    data = memoryview(stream.read())
+    result = bytearray(uncompressed_size + _MAX_COMMANDS_GROUP_OUTPUT_SIZE)
+    position = 0
+    result_position = 0
     for _ in range(num_blocks):
-        (block_size,) = struct.unpack("<H", stream.read(2))
-        block_start = stream.tell()
-
-        def process_block() -> None:
-            for _ in range(256):
-                (commands_byte,) = struct.unpack("<B", stream.read(1))
-                for _ in range(4):
-                    current_command = commands_byte & 0x03
-                    match current_command:
-                        case 0:
-                            return
-                        case 1:
-                            result.write(stream.read(1))
-                        case 2:
-                            data, data2 = struct.unpack("<BB", stream.read(2))
-                            result.seek(-(data | ((data2 & 0xF0) << 4)), os.SEEK_CUR)
-                            data_to_copy = result.read((data2 & 0x0F) + 2)
-                            result.seek(0, os.SEEK_END)
-                            result.write(data_to_copy)
-                        case 3:
-                            (count,) = struct.unpack("<B", stream.read(1))
-                            data = stream.read(1)
-                            result.write(data * (count + 2))
-                        case _:
-                            typing.assert_never(current_command)
-                    commands_byte >>= 2
-
-        process_block()
-        actual_block_size = stream.tell() - block_start
+        (block_size,) = _BLOCK_SIZE_STRUCT.unpack_from(data, position)
+        position += _BLOCK_SIZE_STRUCT.size
+        block_start = position
+
+        try:
+            position, result_position = _decompress_block(
+                data, position, result, result_position
+            )
+        except IndexError:
+            raise ValueError("the compressed data is truncated") from None
+        actual_block_size = position - block_start
         if actual_block_size != block_size:
             warnings.warn(
                 f"The declared compressed block size ({block_size}) doesn't match "
                 f"the actual one ({actual_block_size})!",
                 MnLLibWarning,
             )
+    stream.seek(data_start + position)
+    del result[result_position:]
+
+    if result_position != uncompressed_size:
+        warnings.warn(
+            f"The declared uncompressed size ({uncompressed_size}) doesn't match "
+            f"the actual one ({result_position})!",
+            MnLLibWarning,
+        )
+    return bytes(result)
+
+
+def iter_decompress(stream: typing.BinaryIO) -> typing.Iterator[bytes]:
+    uncompressed_size = decode_varint(stream)
+    num_blocks = decode_varint(stream) + 1
+
+    window = bytearray()
+    actual_uncompressed_size = 0
+    for block_number in range(num_blocks):
+        (block_size,) = _BLOCK_SIZE_STRUCT.unpack(stream.read(_BLOCK_SIZE_STRUCT.size))
+        data = memoryview(stream.read(block_size))
+        window_size = len(window)
+        window += _BLOCK_PADDING
+        try:
+            position, result_position = _decompress_block(data, 0, window, window_size)
+        except IndexError:
+            raise ValueError(
+                f"compressed block {block_number} is truncated or larger than "
+                f"its declared size ({block_size})"
+            ) from None
+        if position != block_size:
+            warnings.warn(
+                f"The declared compressed block size ({block_size}) doesn't match "
+                f"the actual one ({position})!",
+                MnLLibWarning,
+            )
+
+        block = bytes(window[window_size:result_position])
+        del window[result_position:]
+        del window[: max(result_position - 0xFFF, 0)]
+        actual_uncompressed_size += len(block)
+        yield block
 
-    actual_uncompressed_size = result.tell()
     if actual_uncompressed_size != uncompressed_size:
         warnings.warn(
             f"The declared uncompressed size ({uncompressed_size}) doesn't match "
             f"the actual one ({actual_uncompressed_size})!",
             MnLLibWarning,
         )
-    return result.getvalue()
 
 
-def compress(data: bytes) -> bytes:
-    result = io.BytesIO()
+def decompress_to(stream: typing.BinaryIO, out: typing.BinaryIO) -> int:
+    uncompressed_size = 0
+    for block in iter_decompress(stream):
+        out.write(block)
+        uncompressed_size += len(block)
+    return uncompressed_size
 
-    uncompressed_size = len(data)
-    result.write(encode_varint(uncompressed_size))
-    num_blocks = math.ceil(uncompressed_size / 512)
-    result.write(encode_varint(num_blocks - 1))
 
-    for block_number in range(num_blocks):
-        uncompressed_block_position = block_number * 512
-        uncompressed_block_size = min(
-            uncompressed_size - uncompressed_block_position, 512
-        )
-        uncompressed_block_offset = 0
-        compressed_block_position = result.tell()
-        result.write(struct.pack("<H", 0x0000))
-        last_command_number = -1
-
-        while uncompressed_block_offset < uncompressed_block_size:
-            commands_byte_position = result.tell()
-            commands_byte = 0x00
-            result.write(struct.pack("<B", commands_byte))
-            for command_number in range(4):
-                if uncompressed_block_offset >= uncompressed_block_size:
-                    break
-                current_uncompressed_position = (
-                    uncompressed_block_position + uncompressed_block_offset
+class CompressedFile(io.RawIOBase):
+    stream: typing.BinaryIO
+    uncompressed_size: int
+    block_offsets: list[int]
+    block_sizes: list[int]
+    cache_size: int
+
+    _close_stream: bool
+    _position: int
+    _block_cache: collections.OrderedDict[int, bytes]
+
+    def __init__(
+        self,
+        file: typing.BinaryIO | str,
+        cache_size: int = 16,
+    ) -> None:
+        super().__init__()
+        self._close_stream = False
+        self._position = 0
+        self._block_cache = collections.OrderedDict()
+        if cache_size <= _WINDOW_BLOCKS:
+            self.close()
+            raise ValueError(
+                f"cache_size must be greater than {_WINDOW_BLOCKS}, not {cache_size}"
+            )
+        self.cache_size = cache_size
+
+        if isinstance(file, str):
+            file = open(file, "rb")
+            self._close_stream = True
+        self.stream = file
+
+        try:
+            self.uncompressed_size = decode_varint(file)
+            num_blocks = decode_varint(file) + 1
+            self.block_offsets = []
+            self.block_sizes = []
+            for _ in range(num_blocks):
+                (block_size,) = _BLOCK_SIZE_STRUCT.unpack(
+                    file.read(_BLOCK_SIZE_STRUCT.size)
                 )
-                first_byte = data[current_uncompressed_position]
-
-                lz77_best_length = 0
-                lz77_best_offset = -1
-                for offset in range(
-                    min(current_uncompressed_position, 0xFFF),
-                    1,
-                    -1,
-                ):
-                    current_length = 0
-                    while (
-                        current_length < 17
-                        and current_length < offset
-                        and uncompressed_block_offset + current_length
-                        < uncompressed_block_size
-                    ):
-                        if (
-                            data[current_uncompressed_position + current_length]
-                            != data[
-                                current_uncompressed_position - offset + current_length
-                            ]
-                        ):
-                            break
-                        current_length += 1
-                    if current_length > lz77_best_length:
-                        lz77_best_length = current_length
-                        lz77_best_offset = offset
-
-                rle_count = 1
-                while (
-                    uncompressed_block_offset + rle_count < uncompressed_block_size
-                    and rle_count < 257
-                ):
-                    if data[current_uncompressed_position + rle_count] != first_byte:
-                        break
-                    rle_count += 1
-
-                best_length = max(lz77_best_length, rle_count)
-                if best_length <= 1:
-                    current_command = 1
-                    result.write(struct.pack("<B", first_byte))
-                elif lz77_best_length > rle_count:
-                    current_command = 2
-                    result.write(
-                        struct.pack(
-                            "<BB",
-                            lz77_best_offset & 0x0FF,
-                            (lz77_best_length - 2) | ((lz77_best_offset & 0xF00) >> 4),
-                        )
-                    )
-                else:
-                    current_command = 3
-                    result.write(struct.pack("<BB", rle_count - 2, first_byte))
-
-                commands_byte |= current_command << (command_number * 2)
-                uncompressed_block_offset += best_length
-                last_command_number = command_number
-            result.seek(commands_byte_position)
-            result.write(struct.pack("<B", commands_byte))
-            result.seek(0, os.SEEK_END)
-
-        if last_command_number == 3:
-            result.write(struct.pack("<B", 0x00))
-        compressed_block_end_position = result.tell()
-        result.seek(compressed_block_position)
-        result.write(
-            struct.pack(
-                "<H", compressed_block_end_position - compressed_block_position - 2
+                self.block_offsets.append(file.tell())
+                self.block_sizes.append(block_size)
+                file.seek(block_size, os.SEEK_CUR)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if not self.closed:
+            self._block_cache.clear()
+            if self._close_stream:
+                self.stream.close()
+        super().close()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        self._check_not_closed()
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        self._check_not_closed()
+        match whence:
+            case os.SEEK_SET:
+                position = offset
+            case os.SEEK_CUR:
+                position = self._position + offset
+            case os.SEEK_END:
+                position = self.uncompressed_size + offset
+            case _:
+                raise ValueError(f"invalid whence ({whence})")
+        if position < 0:
+            raise ValueError(f"negative seek position {position}")
+        self._position = position
+        return position
+
+    def readinto(self, buffer: collections.abc.Buffer) -> int:
+        self._check_not_closed()
+        view = memoryview(buffer).cast("B")
+        size = max(min(len(view), self.uncompressed_size - self._position), 0)
+        read_size = 0
+        while read_size < size:
+            block_number, block_offset = divmod(self._position, 512)
+            block = self._get_block(block_number)
+            chunk_size = min(size - read_size, len(block) - block_offset)
+            if chunk_size <= 0:
+                break
+            view[read_size : read_size + chunk_size] = block[
+                block_offset : block_offset + chunk_size
+            ]
+            read_size += chunk_size
+            self._position += chunk_size
+        return read_size
+
+    def _check_not_closed(self) -> None:
+        if self.closed:
+            raise ValueError("I/O operation on closed file")
+
+    def _get_block(self, block_number: int) -> bytes:
+        block = self._block_cache.get(block_number)
+        if block is not None:
+            self._block_cache.move_to_end(block_number)
+            return block
+
+        # Back-references can reach into the previous blocks, so decompression has
+        # to start from a block whose window is already cached.
+        first_block_number = block_number
+        while first_block_number > 0 and any(
+            window_block_number not in self._block_cache
+            for window_block_number in range(
+                max(first_block_number - _WINDOW_BLOCKS, 0), first_block_number
             )
+        ):
+            first_block_number -= 1
+        for current_block_number in range(first_block_number, block_number + 1):
+            if current_block_number in self._block_cache:
+                self._block_cache.move_to_end(current_block_number)
+            else:
+                self._decompress_block(current_block_number)
+        return self._block_cache[block_number]
+
+    def _decompress_block(self, block_number: int) -> None:
+        window_block_numbers = range(
+            max(block_number - _WINDOW_BLOCKS, 0), block_number
+        )
+        for window_block_number in window_block_numbers:
+            self._block_cache.move_to_end(window_block_number)
+        result = bytearray().join(
+            self._block_cache[window_block_number]
+            for window_block_number in window_block_numbers
         )
-        result.seek(0, os.SEEK_END)
+        window_size = len(result)
+        result += _BLOCK_PADDING
+
+        self.stream.seek(self.block_offsets[block_number])
+        data = memoryview(self.stream.read(self.block_sizes[block_number]))
+        try:
+            position, result_position = _decompress_block(data, 0, result, window_size)
+        except IndexError:
+            raise ValueError(
+                f"compressed block {block_number} is truncated or larger than "
+                f"its declared size ({self.block_sizes[block_number]})"
+            ) from None
+        if position != len(data):
+            warnings.warn(
+                f"The declared compressed block size ({len(data)}) doesn't match "
+                f"the actual one ({position})!",
+                MnLLibWarning,
+            )
+        block = bytes(result[window_size:result_position])
+        expected_block_size = min(self.uncompressed_size - block_number * 512, 512)
+        if len(block) != expected_block_size:
+            warnings.warn(
+                f"The uncompressed size of block {block_number} ({len(block)}) "
+                f"isn't the expected one ({expected_block_size})!",
+                MnLLibWarning,
+            )
+
+        self._block_cache[block_number] = block
+        while len(self._block_cache) > self.cache_size:
+            self._block_cache.popitem(last=False)
+
+
+class _MatchFinder:
+    data: bytes
+    base: int
+    runs: list[int]
+    max_chain_length: int | None
+    chains: dict[int, list[int]]
+    next_position: int
+
+    def __init__(
+        self,
+        data: bytes,
+        start: int = 0,
+        end: int | None = None,
+        max_chain_length: int | None = None,
+    ) -> None:
+        self.data = data
+        self.base = max(start - 0xFFF, 0)
+        self.max_chain_length = max_chain_length
+        self.chains = {}
+        self.next_position = self.base
+
+        runs_end = len(data) if end is None else min(end + 256, len(data))
+        runs = [1] * (runs_end - self.base)
+        for i in range(len(runs) - 2, -1, -1):
+            if data[self.base + i] == data[self.base + i + 1]:
+                runs[i] = min(runs[i + 1] + 1, 257)
+        self.runs = runs
+
+    def rle_count(self, position: int, max_count: int) -> int:
+        return min(self.runs[position - self.base], max_count)
+
+    def find(self, position: int, max_length: int) -> tuple[int, int]:
+        max_chain_length = self.max_chain_length
+        if max_chain_length is None:
+            return self._find_exhaustive(position, max_length)
+
+        data = self.data
+        base = self.base
+        runs = self.runs
+        chains = self.chains
+        inserted_position = self.next_position
+        while inserted_position < position:
+            run = runs[inserted_position - base]
+            if run > 17:
+                # Positions that start a run of more than 17 bytes are never
+                # searched (the run is encoded with RLE instead), and as
+                # candidates they are no better than the one where the remaining
+                # run is 17 bytes long, so skip straight to that one.
+                inserted_position += run - 17
+                continue
+            key = (
+                data[inserted_position]
+                | (data[inserted_position + 1] << 8)
+                | (run << 16)
+            )
+            chain = chains.get(key)
+            if chain is None:
+                chains[key] = [inserted_position]
+            else:
+                chain.append(inserted_position)
+            inserted_position += 1
+        self.next_position = inserted_position
+
+        if max_length < 2:
+            return 1, -1
+        # Positions are chained by their first two bytes and the length of the run
+        # they start (capped at 17).  Two runs of the same byte but of different
+        # lengths match for exactly the length of the shorter one, so for those only
+        # the oldest candidate in the window has to be looked at.
+        prefix = data[position] | (data[position + 1] << 8)
+        run = min(runs[position - base], 17)
+        chain = chains.get(prefix | (run << 16))
+        if chain is None and run == 1:
+            return 1, -1
+        best_length, best_offset = self._search_chain(
+            chain, position, max_length, max_chain_length
+        )
+        if run == 1:
+            return best_length, best_offset
+        for candidate_run in range(2, 18):
+            if candidate_run == run:
+                continue
+            chain = chains.get(prefix | (candidate_run << 16))
+            if chain is None:
+                continue
+            candidate_index = bisect.bisect_left(chain, position - 0xFFF)
+            if candidate_index >= len(chain):
+                continue
+            offset = position - chain[candidate_index]
+            length = min(run, candidate_run, offset, max_length)
+            if length > best_length or (
+                length == best_length and length > 1 and offset > best_offset
+            ):
+                best_length = length
+                best_offset = offset
+        return best_length, best_offset
+
+    def _find_exhaustive(self, position: int, max_length: int) -> tuple[int, int]:
+        # A match of some length implies matches of every shorter length at the same
+        # offset, so binary search for the longest length that occurs in the window.
+        # bytes.find() returns the oldest occurrence, i.e. the largest offset.
+        if max_length < 2:
+            return 1, -1
+        data = self.data
+        window_start = max(position - 0xFFF, 0)
+        candidate = data.find(data[position : position + 2], window_start, position)
+        if candidate < 0:
+            return 1, -1
+
+        best_length = 2
+        best_candidate = candidate
+        max_possible_length = max_length
+        while best_length < max_possible_length:
+            length = (best_length + max_possible_length + 1) // 2
+            candidate = data.find(
+                data[position : position + length], window_start, position
+            )
+            if candidate >= 0:
+                best_length = length
+                best_candidate = candidate
+            else:
+                max_possible_length = length - 1
+        return best_length, position - best_candidate
+
+    def _search_chain(
+        self,
+        chain: list[int] | None,
+        position: int,
+        max_length: int,
+        max_chain_length: int,
+    ) -> tuple[int, int]:
+        best_length = 1
+        best_offset = -1
+        if chain is None:
+            return best_length, best_offset
+
+        data = self.data
+        first_candidate_index = bisect.bisect_left(chain, position - 0xFFF)
+        for candidate_index in range(
+            len(chain) - 1,
+            max(len(chain) - max_chain_length, first_candidate_index) - 1,
+            -1,
+        ):
+            candidate = chain[candidate_index]
+            offset = position - candidate
+            length_limit = min(max_length, offset)
+            if length_limit <= best_length:
+                continue
+            if (
+                data[candidate : candidate + best_length + 1]
+                != data[position : position + best_length + 1]
+            ):
+                continue
+            length = best_length + 1
+            while (
+                length < length_limit
+                and data[candidate + length] == data[position + length]
+            ):
+                length += 1
+            best_length = length
+            best_offset = offset
+            if length >= max_length:
+                break
+        return best_length, best_offset
+
+
+def _encode_block(commands: list[tuple[int, int, int]]) -> bytearray:
+    block = bytearray(2)
+    for group_start in range(0, len(commands), 4):
+        commands_byte_position = len(block)
+        commands_byte = 0x00
+        block.append(commands_byte)
+        for command_number, (current_command, a, b) in enumerate(
+            commands[group_start : group_start + 4]
+        ):
+            match current_command:
+                case 1:
+                    block.append(a)
+                case 2:
+                    block.append(a & 0x0FF)
+                    block.append((b - 2) | ((a & 0xF00) >> 4))
+                case 3:
+                    block.append(a - 2)
+                    block.append(b)
+                case _:
+                    raise ValueError(f"invalid compression command: {current_command}")
+            commands_byte |= current_command << (command_number * 2)
+        block[commands_byte_position] = commands_byte
+    if len(commands) % 4 == 0:
+        block.append(0x00)
+    struct.pack_into("<H", block, 0, len(block) - 2)
+    return block
+
+
+def _parse_block_greedy(
+    data: bytes, block_start: int, block_end: int, match_finder: _MatchFinder
+) -> list[tuple[int, int, int]]:
+    commands: list[tuple[int, int, int]] = []
+    position = block_start
+    while position < block_end:
+        remaining = block_end - position
+        rle_count = match_finder.rle_count(position, min(remaining, 257))
+        max_length = min(remaining, 17)
+        lz77_best_length, lz77_best_offset = match_finder.find(
+            position, max_length if rle_count < max_length else 0
+        )
+
+        if lz77_best_length <= 1 and rle_count <= 1:
+            commands.append((1, data[position], 0))
+            position += 1
+        elif lz77_best_length > rle_count:
+            commands.append((2, lz77_best_offset, lz77_best_length))
+            position += lz77_best_length
+        else:
+            commands.append((3, rle_count, data[position]))
+            position += rle_count
+    return commands
+
+
+def _parse_block_optimal(
+    data: bytes, block_start: int, block_end: int, match_finder: _MatchFinder
+) -> list[tuple[int, int, int]]:
+    block_size = block_end - block_start
+    lz77_matches: list[tuple[int, int]] = []
+    rle_counts: list[int] = []
+    for position in range(block_start, block_end):
+        remaining = block_end - position
+        rle_count = match_finder.rle_count(position, min(remaining, 257))
+        rle_counts.append(rle_count)
+        max_length = min(remaining, 17)
+        lz77_matches.append(
+            match_finder.find(position, max_length if rle_count < max_length else 0)
+        )
+
+    # The cost of every command is its payload plus, for every 4th command, the
+    # next command byte, so the state is the number of commands modulo 4.
+    costs = [[0] * (block_size + 1) for _ in range(4)]
+    targets = [[0] * block_size for _ in range(4)]
+    for offset in range(block_size - 1, -1, -1):
+        max_length = max(lz77_matches[offset][0], rle_counts[offset])
+        for commands_modulo in range(4):
+            next_costs = costs[(commands_modulo + 1) & 3]
+            command_byte_cost = 1 if commands_modulo == 3 else 0
+            best_cost = 1 + command_byte_cost + next_costs[offset + 1]
+            best_target = offset + 1
+            if max_length >= 2:
+                reachable_costs = next_costs[offset + 2 : offset + max_length + 1]
+                min_reachable_cost = min(reachable_costs)
+                cost = 2 + command_byte_cost + min_reachable_cost
+                if cost < best_cost:
+                    best_cost = cost
+                    best_target = offset + 2 + reachable_costs.index(min_reachable_cost)
+            costs[commands_modulo][offset] = best_cost
+            targets[commands_modulo][offset] = best_target
+
+    commands: list[tuple[int, int, int]] = []
+    offset = 0
+    while offset < block_size:
+        target = targets[len(commands) & 3][offset]
+        length = target - offset
+        position = block_start + offset
+        if length == 1:
+            commands.append((1, data[position], 0))
+        elif length <= rle_counts[offset]:
+            commands.append((3, length, data[position]))
+        else:
+            commands.append((2, lz77_matches[offset][1], length))
+        offset = target
+    return commands
+
+
+_BlockParser = typing.Callable[
+    [bytes, int, int, _MatchFinder], list[tuple[int, int, int]]
+]
+
+
+def _get_block_parser(
+    level: int, max_chain_length: int | None, size: int | None = None
+) -> tuple[_BlockParser, int | None]:
+    if level == COMPRESSION_LEVEL_FAST:
+        # Hash chains only pay off once there is more than a window of input, below
+        # that searching the window directly is faster.
+        if max_chain_length is None and (size is None or size > 0x1000):
+            max_chain_length = 16
+        return _parse_block_greedy, max_chain_length
+    elif level == COMPRESSION_LEVEL_DEFAULT:
+        return _parse_block_greedy, max_chain_length
+    elif level == COMPRESSION_LEVEL_MAX:
+        return _parse_block_optimal, max_chain_length
+    else:
+        raise ValueError(f"invalid compression level: {level}")
+
+
+def _compress_header(uncompressed_size: int) -> bytearray:
+    return encode_varint(uncompressed_size) + encode_varint(
+        math.ceil(uncompressed_size / 512) - 1
+    )
+
+
+def _compress_blocks(
+    data: bytes, start: int, end: int, level: int, max_chain_length: int | None
+) -> list[bytearray]:
+    parse_block, max_chain_length = _get_block_parser(
+        level, max_chain_length, end - start
+    )
+    match_finder = _MatchFinder(data, start, end, max_chain_length)
+    return [
+        _encode_block(
+            parse_block(data, block_start, min(block_start + 512, end), match_finder)
+        )
+        for block_start in range(start, end, 512)
+    ]
+
+
+def _compress_ranges(
+    data: bytes,
+    ranges: list[tuple[int, int]],
+    level: int,
+    max_chain_length: int | None,
+    workers: int | None,
+) -> list[bytearray]:
+    num_blocks = sum(math.ceil((end - start) / 512) for start, end in ranges)
+    if workers is None or workers == 1 or num_blocks <= _MIN_BLOCKS_PER_RANGE:
+        return [
+            block
+            for start, end in ranges
+            for block in _compress_blocks(data, start, end, level, max_chain_length)
+        ]
+
+    # Every worker gets its range plus the window before it, so that it only needs
+    # to be sent a slice of the data.
+    range_size = max(math.ceil(num_blocks / (workers * 4)), _MIN_BLOCKS_PER_RANGE) * 512
+    split_ranges = [
+        (range_start, min(range_start + range_size, end))
+        for start, end in ranges
+        for range_start in range(start, end, range_size)
+    ]
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        return [
+            block
+            for blocks in executor.map(
+                _compress_blocks,
+                [data[max(start - 0xFFF, 0) : end] for start, end in split_ranges],
+                [min(start, 0xFFF) for start, _ in split_ranges],
+                [min(start, 0xFFF) + end - start for start, end in split_ranges],
+                itertools.repeat(level),
+                itertools.repeat(max_chain_length),
+            )
+            for block in blocks
+        ]
+
+
+def _block_cache_key(
+    data: bytes, start: int, end: int, level: int, max_chain_length: int | None
+) -> bytes:
+    key = hashlib.blake2b(digest_size=20)
+    key.update(
+        struct.pack(
+            "<BBi",
+            _BLOCK_CACHE_KEY_VERSION,
+            level,
+            max_chain_length if max_chain_length is not None else -1,
+        )
+    )
+    key.update(data[max(start - 0xFFF, 0) : end])
+    return key.digest()
+
+
+class CompressionCache:
+    max_size: int
+    directory: pathlib.Path | None
+    size: int
+    hits: int
+    misses: int
+
+    _entry_sizes: collections.OrderedDict[bytes, int]
+    _entries: dict[bytes, bytes]
+
+    def __init__(
+        self,
+        max_size: int = 64 * 1024 * 1024,
+        directory: str | os.PathLike[str] | None = None,
+    ) -> None:
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entry_sizes = collections.OrderedDict()
+        self._entries = {}
+
+        if directory is None:
+            self.directory = None
+            return
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry_stats: list[tuple[float, bytes, int]] = []
+        for path in self.directory.iterdir():
+            try:
+                key = bytes.fromhex(path.name)
+                stat = path.stat()
+            except (ValueError, OSError):
+                continue
+            entry_stats.append((stat.st_mtime, key, stat.st_size))
+        for _, key, size in sorted(entry_stats):
+            self._entry_sizes[key] = size
+            self.size += size
+        self._evict()
+
+    def get(self, key: bytes) -> bytes | None:
+        if key not in self._entry_sizes:
+            self.misses += 1
+            return None
+
+        if self.directory is None:
+            value = self._entries[key]
+        else:
+            path = self.directory / key.hex()
+            try:
+                value = path.read_bytes()
+                os.utime(path)
+            except FileNotFoundError:
+                self.size -= self._entry_sizes.pop(key)
+                self.misses += 1
+                return None
+        self._entry_sizes.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: bytes, value: bytes) -> None:
+        if key in self._entry_sizes:
+            self.size -= self._entry_sizes.pop(key)
+            self._entries.pop(key, None)
+        if len(value) > self.max_size:
+            return
+
+        if self.directory is None:
+            self._entries[key] = value
+        else:
+            path = self.directory / key.hex()
+            temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            temp_path.write_bytes(value)
+            os.replace(temp_path, path)
+        self._entry_sizes[key] = len(value)
+        self.size += len(value)
+        self._evict()
+
+    def clear(self) -> None:
+        while len(self._entry_sizes) > 0:
+            self._pop_oldest()
+
+    def _evict(self) -> None:
+        while self.size > self.max_size:
+            self._pop_oldest()
+
+    def _pop_oldest(self) -> None:
+        key, size = self._entry_sizes.popitem(last=False)
+        self.size -= size
+        if self.directory is None:
+            del self._entries[key]
+        else:
+            (self.directory / key.hex()).unlink(missing_ok=True)
+
+
+def compress(
+    data: bytes,
+    level: int = COMPRESSION_LEVEL_DEFAULT,
+    *,
+    max_chain_length: int | None = None,
+    workers: int | None = None,
+    cache: CompressionCache | None = None,
+) -> bytes:
+    _get_block_parser(level, max_chain_length)
+    result = _compress_header(len(data))
+
+    if cache is None:
+        for compressed_block in _compress_ranges(
+            data, [(0, len(data))], level, max_chain_length, workers
+        ):
+            result += compressed_block
+        return bytes(result)
+
+    block_starts = range(0, len(data), 512)
+    keys = [
+        _block_cache_key(
+            data,
+            block_start,
+            min(block_start + 512, len(data)),
+            level,
+            max_chain_length,
+        )
+        for block_start in block_starts
+    ]
+    blocks = [cache.get(key) for key in keys]
+    missing_ranges: list[tuple[int, int]] = []
+    for block_start, block in zip(block_starts, blocks):
+        if block is not None:
+            continue
+        block_end = min(block_start + 512, len(data))
+        if len(missing_ranges) > 0 and missing_ranges[-1][1] == block_start:
+            missing_ranges[-1] = (missing_ranges[-1][0], block_end)
+        else:
+            missing_ranges.append((block_start, block_end))
+
+    missing_blocks = iter(
+        _compress_ranges(data, missing_ranges, level, max_chain_length, workers)
+    )
+    for key, block in zip(keys, blocks):
+        if block is None:
+            block = bytes(next(missing_blocks))
+            cache.put(key, block)
+        result += block
+    return bytes(result)
+
+
+class Compressor:
+    uncompressed_size: int
+    level: int
+    max_chain_length: int | None
+
+    _buffer: bytearray
+    _window_size: int
+    _received_size: int
+    _header_written: bool
+    _flushed: bool
+
+    def __init__(
+        self,
+        uncompressed_size: int,
+        level: int = COMPRESSION_LEVEL_DEFAULT,
+        *,
+        max_chain_length: int | None = None,
+    ) -> None:
+        _get_block_parser(level, max_chain_length)
+        self.uncompressed_size = uncompressed_size
+        self.level = level
+        self.max_chain_length = max_chain_length
+
+        self._buffer = bytearray()
+        self._window_size = 0
+        self._received_size = 0
+        self._header_written = False
+        self._flushed = False
+
+    def compress(self, data: bytes) -> bytes:
+        if self._flushed:
+            raise ValueError("the compressor has already been flushed")
+        if self._received_size + len(data) > self.uncompressed_size:
+            raise ValueError(
+                f"more data ({self._received_size + len(data)} bytes) than "
+                f"the declared uncompressed size ({self.uncompressed_size})"
+            )
+        self._received_size += len(data)
+        self._buffer += data
+
+        return self._compress_pending_blocks(
+            (len(self._buffer) - self._window_size) // 512 * 512
+        )
+
+    def flush(self) -> bytes:
+        if self._flushed:
+            raise ValueError("the compressor has already been flushed")
+        if self._received_size != self.uncompressed_size:
+            raise ValueError(
+                f"less data ({self._received_size} bytes) than "
+                f"the declared uncompressed size ({self.uncompressed_size})"
+            )
+        self._flushed = True
+
+        return self._compress_pending_blocks(len(self._buffer) - self._window_size)
+
+    def _compress_pending_blocks(self, size: int) -> bytes:
+        result = bytearray()
+        if not self._header_written:
+            result += _compress_header(self.uncompressed_size)
+            self._header_written = True
+
+        if size > 0:
+            end = self._window_size + size
+            for block in _compress_blocks(
+                bytes(self._buffer),
+                self._window_size,
+                end,
+                self.level,
+                self.max_chain_length,
+            ):
+                result += block
+            del self._buffer[: max(end - 0xFFF, 0)]
+            self._window_size = min(end, 0xFFF)
 
-    return result.getvalue()
+        return bytes(result)
@@ -3,6 +3,12 @@ import struct
 
 MNL_ENCODING = "cp1252"
 COMMAND_PARAMETER_STRUCT_MAP = [struct.Struct(f"<{x}") for x in "BHIbhihi"]
+COMMAND_HEADER_STRUCT = struct.Struct("<HI")
+COMMAND_PARAMETER_METADATA_STRUCT = struct.Struct("<B15B")
+
+COMPRESSION_LEVEL_FAST = 0
+COMPRESSION_LEVEL_DEFAULT = 1
+COMPRESSION_LEVEL_MAX = 2
 
 
 FEVENT_SCRIPT_ALIGNMENT = 4
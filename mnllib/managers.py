@@ -1,12 +1,25 @@
+import os
 import abc
+import sys
+import asyncio
+import math
 import struct
+import hashlib
+import pathlib
 import itertools
 import warnings
+import threading
+import collections
+import collections.abc
+import multiprocessing
+import multiprocessing.context
+import concurrent.futures
 import typing
 
 from .consts import (
     BATTLE_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS,
     BATTLE_NUMBER_OF_COMMANDS,
+    COMMAND_PARAMETER_METADATA_STRUCT,
     FEVENT_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS,
     FEVENT_OFFSET_TABLE_LENGTH_ADDRESS,
     FEVENT_OFFSET_TABLE_ADDRESS,
@@ -17,23 +30,64 @@ from .consts import (
     SHOP_NUMBER_OF_COMMANDS,
 )
 from .misc import FEventChunk, MnLLibWarning, parse_fevent_chunk
-from .script import CommandParameterMetadata, FEventScript
+from .utils import (
+    open_buffer,
+    patch_file,
+    read_file_range,
+    to_thread_shielded,
+    write_bytes_into,
+)
+from .script import CommandFormat, CommandParameterMetadata, FEventScript
 
 
 class MnLScriptManager(abc.ABC):
     command_parameter_metadata_table: list[CommandParameterMetadata]
 
+    _command_formats: dict[tuple[int, int, bool], CommandFormat]
+
     def __init__(self) -> None:
         self.command_parameter_metadata_table = []
+        self._command_formats = {}
+
+    def get_command_format(
+        self,
+        command_id: int,
+        param_variables_bitfield: int,
+        has_return_value: bool | None = None,
+    ) -> CommandFormat:
+        metadata = self.command_parameter_metadata_table[command_id]
+        if has_return_value is None:
+            has_return_value = metadata.has_return_value
+        # Bits above the parameter count don't change the format.
+        param_variables_bitfield &= (1 << len(metadata.parameter_types)) - 1
+        key = (command_id, param_variables_bitfield, has_return_value)
+        command_format = self._command_formats.get(key)
+        if (
+            command_format is None
+            or command_format.metadata is not metadata
+            or command_format.parameter_types != metadata.parameter_types
+        ):
+            command_format = CommandFormat(
+                command_id, metadata, param_variables_bitfield, has_return_value
+            )
+            self._command_formats[key] = command_format
+        return command_format
 
     def load_command_parameter_metadata_table(
-        self, stream: typing.BinaryIO, number_of_commands: int
+        self,
+        stream: typing.BinaryIO | collections.abc.Buffer,
+        number_of_commands: int,
     ) -> None:
-        self.command_parameter_metadata_table = []
-        for _ in range(number_of_commands):
-            self.command_parameter_metadata_table.append(
-                CommandParameterMetadata.from_bytes(stream.read(16))
+        size = number_of_commands * COMMAND_PARAMETER_METADATA_STRUCT.size
+        self.command_parameter_metadata_table = [
+            CommandParameterMetadata.from_values(values)
+            for values in COMMAND_PARAMETER_METADATA_STRUCT.iter_unpack(
+                memoryview(stream)[:size]
+                if isinstance(stream, collections.abc.Buffer)
+                else stream.read(size)
             )
+        ]
+        self._command_formats = {}
 
     def save_command_parameter_metadata_table(
         self, data: bytearray, metadata_table_address: int, number_of_commands: int
@@ -47,6 +101,203 @@ class MnLScriptManager(abc.ABC):
             ]
         )
 
+    def patch_command_parameter_metadata_table(
+        self,
+        file: typing.BinaryIO | str,
+        metadata_table_address: int,
+        number_of_commands: int,
+        atomic: bool = False,
+    ) -> None:
+        patch_file(
+            file,
+            metadata_table_address,
+            number_of_commands * COMMAND_PARAMETER_METADATA_STRUCT.size,
+            b"".join(
+                [
+                    parameter_metadata.to_bytes()
+                    for parameter_metadata in self.command_parameter_metadata_table
+                ]
+            ),
+            atomic,
+        )
+
+
+class FEventChunkCacheEntry:
+    size: int
+    digest: bytes
+    dirty: bool
+    chunk: FEventChunk | None
+
+    def __init__(self, chunk: FEventChunk | None, data: bytes | memoryview) -> None:
+        self.size = len(data)
+        self.digest = hashlib.blake2b(data, digest_size=16).digest()
+        self.dirty = False
+        self.chunk = chunk
+
+    def is_modified(self, manager: MnLScriptManager) -> bool:
+        if not self.dirty:
+            chunk = self.chunk
+            self.dirty = (
+                hashlib.blake2b(
+                    chunk.to_bytes(manager) if chunk is not None else b"",
+                    digest_size=16,
+                ).digest()
+                != self.digest
+            )
+        return self.dirty
+
+    def reference_count(self) -> int:
+        return sys.getrefcount(self.chunk)
+
+    def is_referenced(self) -> bool:
+        return (
+            self.chunk is not None
+            and self.reference_count() > _UNREFERENCED_CHUNK_REFERENCE_COUNT
+        )
+
+
+# What `reference_count()` reports when only the entry holds the chunk.
+_UNREFERENCED_CHUNK_REFERENCE_COUNT = FEventChunkCacheEntry(
+    typing.cast(FEventChunk, object()), b""
+).reference_count()
+
+
+class FEventChunkCache:
+    max_size: int
+    max_entries: int | None
+    size: int
+    hits: int
+    misses: int
+
+    _entries: collections.OrderedDict[int, FEventChunkCacheEntry]
+    _released_entries: dict[int, FEventChunkCacheEntry]
+
+    def __init__(
+        self, max_size: int = 16 * 1024 * 1024, max_entries: int | None = None
+    ) -> None:
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._released_entries = {}
+
+    def __contains__(self, index: int) -> bool:
+        return index in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self, index: int, manager: MnLScriptManager
+    ) -> FEventChunkCacheEntry | None:
+        entry = self._entries.get(index)
+        if entry is not None:
+            self._entries.move_to_end(index)
+            self.hits += 1
+            return entry
+
+        entry = self._released_entries.pop(index, None)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.put(index, entry, manager)
+        self.hits += 1
+        return entry
+
+    def peek(self, index: int) -> FEventChunkCacheEntry | None:
+        entry = self._entries.get(index)
+        if entry is None:
+            entry = self._released_entries.get(index)
+        return entry
+
+    def put(
+        self, index: int, entry: FEventChunkCacheEntry, manager: MnLScriptManager
+    ) -> None:
+        old_entry = self._entries.pop(index, None)
+        if old_entry is not None:
+            self.size -= old_entry.size
+        self._released_entries.pop(index, None)
+        self._entries[index] = entry
+        self.size += entry.size
+        self.evict(manager, keep=index)
+
+    def update_size(self) -> None:
+        self.size = sum(entry.size for entry in self._entries.values())
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._released_entries.clear()
+        self.size = 0
+
+    def evict(self, manager: MnLScriptManager, keep: int | None = None) -> None:
+        # Released entries stay strongly referenced until they are known to be
+        # unmodified and nothing else can still modify them.
+        for index, entry in list(self._released_entries.items()):
+            if not entry.is_referenced() and not entry.is_modified(manager):
+                del self._released_entries[index]
+
+        for index, entry in list(self._entries.items()):
+            if self.size <= self.max_size and (
+                self.max_entries is None or len(self._entries) <= self.max_entries
+            ):
+                break
+            if index == keep or entry.is_modified(manager):
+                continue
+            del self._entries[index]
+            self.size -= entry.size
+            if entry.is_referenced():
+                self._released_entries[index] = entry
+
+
+def _parse_fevent_chunks(
+    command_parameter_metadata_table: list[CommandParameterMetadata],
+    chunks_data: list[tuple[int, bytes]],
+) -> tuple[list[FEventChunk | None], list[Warning]]:
+    manager = FEventScriptManager(load=False)
+    manager.command_parameter_metadata_table = command_parameter_metadata_table
+    with warnings.catch_warnings(record=True) as caught_warnings:
+        warnings.simplefilter("always")
+        chunks = [
+            parse_fevent_chunk(manager, chunk_data, index)
+            for index, chunk_data in chunks_data
+        ]
+    return chunks, [
+        typing.cast(Warning, warning.message) for warning in caught_warnings
+    ]
+
+
+_forked_fevent_chunks: tuple["FEventScriptManager", dict[int, FEventChunk]] | None = (
+    None
+)
+
+
+def _serialize_fevent_chunks(
+    command_parameter_metadata_table: list[CommandParameterMetadata],
+    chunks: list[FEventChunk],
+) -> list[bytes]:
+    manager = FEventScriptManager(load=False)
+    manager.command_parameter_metadata_table = command_parameter_metadata_table
+    return [chunk.to_bytes(manager) for chunk in chunks]
+
+
+def _get_fevent_mp_context() -> multiprocessing.context.BaseContext | None:
+    # Forking a multi-threaded process can deadlock the child.
+    if (
+        threading.active_count() > 1
+        and "forkserver" in multiprocessing.get_all_start_methods()
+    ):
+        return multiprocessing.get_context("forkserver")
+    return None
+
+
+def _serialize_forked_fevent_chunks(indices: list[int]) -> list[bytes]:
+    manager, chunks = typing.cast(
+        tuple["FEventScriptManager", dict[int, FEventChunk]], _forked_fevent_chunks
+    )
+    return [chunks[index].to_bytes(manager) for index in indices]
+
 
 class FEventScriptManager(MnLScriptManager):
     fevent_offset_table: list[tuple[int, int, int]]
@@ -55,11 +306,28 @@ class FEventScriptManager(MnLScriptManager):
     ]
     fevent_footer_offset: int
     fevent_footer: bytes
+    fevent_source: typing.BinaryIO | str | None
+    fevent_chunk_cache: FEventChunkCache | None
+    fevent_lazy: bool
 
-    def __init__(self, load: bool = True) -> None:
+    _fevent_loaded_chunks: list[tuple[FEventChunk | None, bytes | memoryview]] | None
+    _fevent_loaded_footer: bytes | None
+    _fevent_dirty_chunks: set[int]
+
+    def __init__(
+        self,
+        load: bool = True,
+        cache_directory: str | os.PathLike[str] | None = None,
+    ) -> None:
         super().__init__()
+        self.fevent_source = None
+        self.fevent_chunk_cache = None
+        self.fevent_lazy = False
+        self._fevent_loaded_chunks = None
+        self._fevent_loaded_footer = None
+        self._fevent_dirty_chunks = set()
         if load:
-            self.load_all()
+            self.load_all(cache_directory=cache_directory)
         else:
             self.fevent_offset_table = []
             self.fevent_chunks = []
@@ -67,16 +335,17 @@ class FEventScriptManager(MnLScriptManager):
             self.fevent_footer = b""
 
     def load_overlay3(
-        self, file: typing.BinaryIO | str = "data/overlay.dec/overlay_0003.dec.bin"
+        self,
+        file: typing.BinaryIO | str | collections.abc.Buffer = (
+            "data/overlay.dec/overlay_0003.dec.bin"
+        ),
     ) -> None:
-        close_file = False
-        if isinstance(file, str):
-            file = open(file, "rb")
-            close_file = True
-
-        try:
-            file.seek(FEVENT_OFFSET_TABLE_LENGTH_ADDRESS)
-            fevent_offset_table_length = struct.unpack("<I", file.read(4))[0] // 4 - 1
+        with open_buffer(file) as data:
+            fevent_offset_table_length = (
+                struct.unpack_from("<I", data, FEVENT_OFFSET_TABLE_LENGTH_ADDRESS)[0]
+                // 4
+                - 1
+            )
             if fevent_offset_table_length % 3 != 1:
                 warnings.warn(
                     "The length of the FEvent offset table "
@@ -84,180 +353,694 @@ class FEventScriptManager(MnLScriptManager):
                     f"but rather {fevent_offset_table_length % 3}!",
                     MnLLibWarning,
                 )
-            self.fevent_offset_table = []
-            for _ in range(fevent_offset_table_length // 3):
-                self.fevent_offset_table.append(struct.unpack("<III", file.read(4 * 3)))
-            (self.fevent_footer_offset,) = struct.unpack("<I", file.read(4))
-        finally:
-            if close_file:
-                file.close()
+            footer_offset_address = (
+                FEVENT_OFFSET_TABLE_ADDRESS + fevent_offset_table_length // 3 * 4 * 3
+            )
+            self.fevent_offset_table = list(
+                struct.iter_unpack(
+                    "<III", data[FEVENT_OFFSET_TABLE_ADDRESS:footer_offset_address]
+                )
+            )
+            (self.fevent_footer_offset,) = struct.unpack_from(
+                "<I", data, footer_offset_address
+            )
 
     def load_overlay6(
-        self, file: typing.BinaryIO | str = "data/overlay.dec/overlay_0006.dec.bin"
+        self,
+        file: typing.BinaryIO | str | collections.abc.Buffer = (
+            "data/overlay.dec/overlay_0006.dec.bin"
+        ),
     ) -> None:
+        with open_buffer(file) as data:
+            self.load_command_parameter_metadata_table(
+                data[FEVENT_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS:],
+                FEVENT_NUMBER_OF_COMMANDS,
+            )
+
+    def load_fevent(
+        self,
+        file: typing.BinaryIO | str | collections.abc.Buffer = (
+            "data/data/FEvent/FEvent.dat"
+        ),
+        lazy: bool = False,
+        workers: int | None = None,
+    ) -> None:
+        data, chunks_data = self._read_fevent(file)
+        if workers is None or workers == 1 or lazy:
+            chunks = [
+                parse_fevent_chunk(self, chunk_data, index, lazy)
+                for index, chunk_data in enumerate(chunks_data)
+            ]
+        else:
+            chunks = self._parse_fevent_chunks_parallel(chunks_data, workers)
+        self._set_loaded_fevent(
+            file if not isinstance(file, collections.abc.Buffer) else None,
+            data,
+            chunks_data,
+            chunks,
+        )
+
+    def _read_fevent(
+        self, file: typing.BinaryIO | str | collections.abc.Buffer
+    ) -> tuple[memoryview, list[memoryview]]:
+        # Loaded chunks keep views of the data, so only immutable bytes are used
+        # in place.  Other buffers could change or be closed under them.
+        if isinstance(file, bytes):
+            data_view = memoryview(file)
+        elif isinstance(file, collections.abc.Buffer):
+            data_view = memoryview(bytes(file))
+        else:
+            close_file = False
+            if isinstance(file, str):
+                file = open(file, "rb")
+                close_file = True
+
+            try:
+                file.seek(0)
+                data_view = memoryview(file.read())
+            finally:
+                if close_file:
+                    file.close()
+
+        flat_fevent_offset_table = list(
+            itertools.chain.from_iterable(self.fevent_offset_table)
+        )
+        return data_view, [
+            data_view[
+                offset : (
+                    flat_fevent_offset_table[index + 1]
+                    if index + 1 < len(flat_fevent_offset_table)
+                    else offset
+                )
+            ]
+            for index, offset in enumerate(flat_fevent_offset_table)
+        ]
+
+    def _set_loaded_fevent(
+        self,
+        source: typing.BinaryIO | str | None,
+        data: memoryview,
+        chunks_data: list[memoryview],
+        chunks: list[FEventChunk | None],
+    ) -> None:
+        self.fevent_source = source
+        self.fevent_chunk_cache = None
+        self._fevent_dirty_chunks = set()
+        self.fevent_chunks = [
+            typing.cast(
+                tuple[FEventScript | None, FEventChunk | None, FEventChunk | None],
+                tuple(chunks[index : index + 3]),
+            )
+            for index in range(0, len(chunks), 3)
+        ]
+        self._fevent_loaded_chunks = list(zip(chunks, chunks_data))
+        self.fevent_footer = bytes(data[self.fevent_footer_offset :])
+        self._fevent_loaded_footer = self.fevent_footer
+
+    def _parse_fevent_chunks_parallel(
+        self, chunks_data: list[memoryview], workers: int
+    ) -> list[FEventChunk | None]:
+        batch_size = math.ceil(
+            sum(len(chunk_data) for chunk_data in chunks_data) / (workers * 4)
+        )
+        batches: list[list[tuple[int, bytes]]] = [[]]
+        size = 0
+        for index, chunk_data in enumerate(chunks_data):
+            if size >= batch_size:
+                batches.append([])
+                size = 0
+            batches[-1].append((index, bytes(chunk_data)))
+            size += len(chunk_data)
+
+        chunks: list[FEventChunk | None] = []
+        with concurrent.futures.ProcessPoolExecutor(
+            workers, mp_context=_get_fevent_mp_context()
+        ) as executor:
+            for parsed_chunks, caught_warnings in executor.map(
+                _parse_fevent_chunks,
+                itertools.repeat(self.command_parameter_metadata_table),
+                batches,
+            ):
+                for warning in caught_warnings:
+                    warnings.warn(warning)
+                chunks.extend(parsed_chunks)
+        return chunks
+
+    def open_fevent(
+        self,
+        file: typing.BinaryIO | str = "data/data/FEvent/FEvent.dat",
+        max_cache_size: int = 16 * 1024 * 1024,
+        max_cache_entries: int | None = None,
+        lazy: bool = False,
+    ) -> None:
+        self.fevent_source = file
+        self.fevent_chunk_cache = FEventChunkCache(max_cache_size, max_cache_entries)
+        self.fevent_lazy = lazy
+        self.fevent_chunks = []
+        self.fevent_footer = self._read_fevent_source(self.fevent_footer_offset, None)
+        self._fevent_loaded_chunks = None
+        self._fevent_loaded_footer = self.fevent_footer
+        self._fevent_dirty_chunks = set()
+
+    def get_fevent_chunk_range(self, index: int) -> tuple[int, int]:
+        triple_index, chunk_index = divmod(index, 3)
+        offset = self.fevent_offset_table[triple_index][chunk_index]
+        if chunk_index < 2:
+            end = self.fevent_offset_table[triple_index][chunk_index + 1]
+        elif triple_index + 1 < len(self.fevent_offset_table):
+            end = self.fevent_offset_table[triple_index + 1][0]
+        else:
+            end = offset
+        return offset, end
+
+    def get_chunk(self, index: int) -> FEventChunk | None:
+        if self.fevent_chunk_cache is None:
+            return self.fevent_chunks[index // 3][index % 3]
+
+        entry = self.fevent_chunk_cache.get(index, self)
+        if entry is not None:
+            return entry.chunk
+
+        offset, end = self.get_fevent_chunk_range(index)
+        data = self._read_fevent_source(offset, end - offset)
+        chunk = parse_fevent_chunk(self, data, index, self.fevent_lazy)
+        self.fevent_chunk_cache.put(index, FEventChunkCacheEntry(chunk, data), self)
+        return chunk
+
+    def get_triple(
+        self, room_id: int
+    ) -> tuple[FEventScript | None, FEventChunk | None, FEventChunk | None]:
+        return typing.cast(
+            tuple[FEventScript | None, FEventChunk | None, FEventChunk | None],
+            tuple(self.get_chunk(room_id * 3 + i) for i in range(3)),
+        )
+
+    def _read_fevent_source(self, offset: int, size: int | None) -> bytes:
+        if self.fevent_source is None:
+            raise ValueError("FEvent.dat has not been opened with open_fevent()")
+
+        file = self.fevent_source
         close_file = False
         if isinstance(file, str):
             file = open(file, "rb")
             close_file = True
 
+        position = file.tell()
         try:
-            file.seek(FEVENT_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS)
-            self.load_command_parameter_metadata_table(file, FEVENT_NUMBER_OF_COMMANDS)
+            file.seek(offset)
+            return file.read(size if size is not None else -1)
         finally:
             if close_file:
                 file.close()
+            else:
+                file.seek(position)
 
-    def load_fevent(
-        self, file: typing.BinaryIO | str = "data/data/FEvent/FEvent.dat"
+    def load_all(
+        self,
+        workers: int | None = None,
+        cache_directory: str | os.PathLike[str] | None = None,
+        overlay3: str = "data/overlay.dec/overlay_0003.dec.bin",
+        overlay6: str = "data/overlay.dec/overlay_0006.dec.bin",
+        fevent: str = "data/data/FEvent/FEvent.dat",
     ) -> None:
-        close_file = False
-        if isinstance(file, str):
-            file = open(file, "rb")
-            close_file = True
+        if cache_directory is None:
+            self.load_overlay3(overlay3)
+            self.load_overlay6(overlay6)
+            self.load_fevent(fevent, workers=workers)
+            return
+
+        from .state import (
+            decode_fevent_chunks,
+            encode_fevent_chunk,
+            read_fevent_state,
+            write_fevent_state,
+        )
+
+        paths = [overlay3, overlay6, fevent]
+        signature = hashlib.blake2b(digest_size=16)
+        for path in paths:
+            stat = os.stat(path)
+            signature.update(struct.pack("<QQ", stat.st_size, stat.st_mtime_ns))
+        cache_path = pathlib.Path(cache_directory) / (
+            hashlib.blake2b(
+                "\0".join(os.path.abspath(path) for path in paths).encode(),
+                digest_size=16,
+            ).hexdigest()
+            + ".fevent"
+        )
 
         try:
-            flat_fevent_offset_table = list(
-                itertools.chain.from_iterable(self.fevent_offset_table)
+            with cache_path.open("rb") as file:
+                state = read_fevent_state(file, signature.digest())
+        except FileNotFoundError:
+            state = None
+        if state is not None:
+            (
+                self.fevent_offset_table,
+                self.fevent_footer_offset,
+                metadata_table_state,
+                chunk_states,
+            ) = state
+            self.command_parameter_metadata_table = [
+                CommandParameterMetadata(has_return_value, parameter_types)
+                for has_return_value, parameter_types in metadata_table_state
+            ]
+            self._command_formats = {}
+            data, chunks_data = self._read_fevent(paths[2])
+            self._set_loaded_fevent(
+                paths[2], data, chunks_data, decode_fevent_chunks(chunk_states)
             )
-            index = 0
-            self.fevent_chunks = []
-            for triple in self.fevent_offset_table:
-                chunk_triple: tuple[FEventChunk | None, ...] = ()
-                for offset in triple:
-                    file.seek(offset)
-                    chunk_triple += (
-                        parse_fevent_chunk(
-                            self,
-                            file.read(
-                                (flat_fevent_offset_table[index + 1] - offset)
-                                if index + 1 < len(flat_fevent_offset_table)
-                                else 0
-                            ),
-                            index,
-                        ),
-                    )
-                    index += 1
-                self.fevent_chunks.append(
-                    typing.cast(
-                        tuple[
-                            FEventScript | None, FEventChunk | None, FEventChunk | None
+            return
+
+        self.load_overlay3(paths[0])
+        self.load_overlay6(paths[1])
+        self.load_fevent(paths[2], workers=workers)
+
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        try:
+            with temp_path.open("wb") as file:
+                write_fevent_state(
+                    file,
+                    signature.digest(),
+                    (
+                        self.fevent_offset_table,
+                        self.fevent_footer_offset,
+                        [
+                            (metadata.has_return_value, metadata.parameter_types)
+                            for metadata in self.command_parameter_metadata_table
                         ],
-                        chunk_triple,
-                    )
+                        [
+                            encode_fevent_chunk(chunk)
+                            for triple in self.fevent_chunks
+                            for chunk in triple
+                        ],
+                    ),
                 )
-
-            file.seek(self.fevent_footer_offset)
-            self.fevent_footer = file.read()
+            os.replace(temp_path, cache_path)
         finally:
-            if close_file:
-                file.close()
-
-    def load_all(self) -> None:
-        self.load_overlay3()
-        self.load_overlay6()
-        self.load_fevent()
+            temp_path.unlink(missing_ok=True)
 
     def save_overlay3(
-        self, file: typing.BinaryIO | str = "data/overlay.dec/overlay_0003.dec.bin"
+        self,
+        file: typing.BinaryIO | str = "data/overlay.dec/overlay_0003.dec.bin",
+        atomic: bool = False,
     ) -> None:
+        old_fevent_offset_table_length = (
+            struct.unpack(
+                "<I", read_file_range(file, FEVENT_OFFSET_TABLE_LENGTH_ADDRESS, 4)
+            )[0]
+            // 4
+            - 1
+        )
+        patch_file(
+            file,
+            FEVENT_OFFSET_TABLE_LENGTH_ADDRESS,
+            FEVENT_OFFSET_TABLE_ADDRESS
+            + old_fevent_offset_table_length * 4
+            - FEVENT_OFFSET_TABLE_LENGTH_ADDRESS,
+            struct.pack("<I", (len(self.fevent_offset_table) * 3 + 2) * 4)
+            + b"".join(
+                [struct.pack("<III", a, b, c) for a, b, c in self.fevent_offset_table]
+            )
+            + struct.pack("<I", self.fevent_footer_offset),
+            atomic,
+        )
+
+    def save_overlay6(
+        self,
+        file: typing.BinaryIO | str = "data/overlay.dec/overlay_0006.dec.bin",
+        atomic: bool = False,
+    ) -> None:
+        self.patch_command_parameter_metadata_table(
+            file,
+            FEVENT_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS,
+            FEVENT_NUMBER_OF_COMMANDS,
+            atomic,
+        )
+
+    def mark_dirty(self, index: int) -> None:
+        if self.fevent_chunk_cache is not None:
+            entry = self.fevent_chunk_cache.peek(index)
+            if entry is not None:
+                entry.dirty = True
+        else:
+            self._fevent_dirty_chunks.add(index)
+
+    def save_fevent(
+        self,
+        file: typing.BinaryIO | str = "data/data/FEvent/FEvent.dat",
+        detect_changes: bool = True,
+        workers: int | None = None,
+    ) -> None:
+        modified_chunks: dict[int, FEventChunk | bytes | None] = {}
+        possibly_modified_chunks: dict[int, FEventChunk] = {}
+        if self.fevent_chunk_cache is not None:
+            number_of_chunks = len(self.fevent_offset_table) * 3
+            flat_chunks: list[FEventChunk | None] = []
+            loaded_chunks: list[tuple[FEventChunk | None, bytes | memoryview]] = []
+            for index in range(number_of_chunks):
+                entry = self.fevent_chunk_cache.peek(index)
+                if entry is not None and (
+                    entry.dirty or (detect_changes and entry.is_modified(self))
+                ):
+                    modified_chunks[index] = entry.chunk
+        else:
+            flat_chunks = list(itertools.chain.from_iterable(self.fevent_chunks))
+            number_of_chunks = len(flat_chunks)
+            loaded_chunks = (
+                self._fevent_loaded_chunks
+                if self._fevent_loaded_chunks is not None
+                else []
+            )
+            for index, chunk in enumerate(flat_chunks):
+                if (
+                    index >= len(loaded_chunks)
+                    or index in self._fevent_dirty_chunks
+                    or chunk is not loaded_chunks[index][0]
+                ):
+                    modified_chunks[index] = chunk
+                elif detect_changes and chunk is not None:
+                    possibly_modified_chunks[index] = chunk
+
+        if workers is not None and workers != 1:
+            serialized_chunks = self._serialize_fevent_chunks_parallel(
+                {
+                    index: chunk
+                    for index, chunk in itertools.chain(
+                        modified_chunks.items(), possibly_modified_chunks.items()
+                    )
+                    if isinstance(chunk, FEventChunk)
+                },
+                workers,
+            )
+            for index in modified_chunks.keys() & serialized_chunks.keys():
+                modified_chunks[index] = serialized_chunks[index]
+        else:
+            serialized_chunks = {}
+        for index, chunk in possibly_modified_chunks.items():
+            chunk_data = (
+                serialized_chunks[index]
+                if index in serialized_chunks
+                else chunk.to_bytes(self)
+            )
+            if chunk_data != loaded_chunks[index][1]:
+                modified_chunks[index] = chunk_data
+        modified_sizes = {
+            index: (
+                len(chunk)
+                if isinstance(chunk, bytes)
+                else chunk.size_of(self) if chunk is not None else 0
+            )
+            for index, chunk in modified_chunks.items()
+        }
+
+        can_patch = (
+            number_of_chunks == len(self.fevent_offset_table) * 3
+            and (
+                self.fevent_chunk_cache is not None
+                or self._fevent_loaded_chunks is not None
+            )
+            and self._fevent_loaded_footer is not None
+            and len(self.fevent_footer) == len(self._fevent_loaded_footer)
+        )
+        for index, size in modified_sizes.items():
+            if not can_patch:
+                break
+            offset, end = self.get_fevent_chunk_range(index)
+            can_patch = size == end - offset
+        if can_patch and self._is_fevent_source(file):
+            self._patch_fevent(file, modified_chunks, flat_chunks)
+            return
+
+        source_data = (
+            memoryview(self._read_fevent_source(0, None))
+            if self.fevent_chunk_cache is not None
+            else None
+        )
+        chunks: list[FEventChunk | bytes | memoryview | None] = []
+        for index in range(number_of_chunks):
+            if index in modified_chunks:
+                chunks.append(modified_chunks[index])
+            elif source_data is not None:
+                offset, end = self.get_fevent_chunk_range(index)
+                chunks.append(source_data[offset:end])
+            else:
+                chunks.append(
+                    typing.cast(
+                        list[tuple[FEventChunk | None, bytes | memoryview]],
+                        self._fevent_loaded_chunks,
+                    )[index][1]
+                )
+
+        destination = file
         close_file = False
         if isinstance(file, str):
-            file = open(file, "r+b")
+            file = open(file, "wb")
             close_file = True
 
         try:
-            overlay3_raw = bytearray(file.read())
-
-            old_fevent_offset_table_length = (
-                struct.unpack(
-                    "<I",
-                    overlay3_raw[
-                        FEVENT_OFFSET_TABLE_LENGTH_ADDRESS : (
-                            FEVENT_OFFSET_TABLE_LENGTH_ADDRESS + 4
-                        )
-                    ],
-                )[0]
-                // 4
-                - 1
-            )
-            del overlay3_raw[
-                FEVENT_OFFSET_TABLE_LENGTH_ADDRESS : FEVENT_OFFSET_TABLE_ADDRESS
-                + old_fevent_offset_table_length * 4
-            ]
-            overlay3_raw[
-                FEVENT_OFFSET_TABLE_LENGTH_ADDRESS:FEVENT_OFFSET_TABLE_LENGTH_ADDRESS
-            ] = (
-                struct.pack("<I", (len(self.fevent_offset_table) * 3 + 2) * 4)
-                + b"".join(
-                    [
-                        struct.pack("<III", a, b, c)
-                        for a, b, c in self.fevent_offset_table
-                    ]
+            base_offset = file.tell()
+            self.fevent_offset_table = []
+            chunk_offsets: list[tuple[FEventChunk | bytes | memoryview, int, int]] = []
+            chunk_ranges: list[tuple[int, int]] = []
+            size = 0
+            offset_triple: tuple[int, ...] = ()
+            for index, chunk_or_data in enumerate(chunks):
+                offset_triple += (base_offset + size,)
+                chunk_size = (
+                    modified_sizes[index]
+                    if index in modified_sizes
+                    else len(typing.cast(bytes | memoryview, chunk_or_data))
                 )
-                + struct.pack("<I", self.fevent_footer_offset)
-            )
+                if chunk_size > 0:
+                    chunk_offsets.append(
+                        (
+                            typing.cast(
+                                FEventChunk | bytes | memoryview, chunk_or_data
+                            ),
+                            index,
+                            size,
+                        )
+                    )
+                chunk_ranges.append((size, size + chunk_size))
+                size += chunk_size
+                if len(offset_triple) >= 3:
+                    self.fevent_offset_table.append(
+                        typing.cast(tuple[int, int, int], offset_triple)
+                    )
+                    offset_triple = ()
+            self.fevent_footer_offset = base_offset + size
 
-            file.seek(0)
-            file.truncate()
-            file.write(overlay3_raw)
+            data = bytearray(size + len(self.fevent_footer))
+            data_view = memoryview(data)
+            for chunk_or_data, index, offset in chunk_offsets:
+                if isinstance(chunk_or_data, (bytes, memoryview)):
+                    end = write_bytes_into(data_view, offset, chunk_or_data)
+                else:
+                    end = chunk_or_data.write_into(data_view, offset, self)
+                if self.fevent_chunk_cache is not None:
+                    entry = self.fevent_chunk_cache.peek(index)
+                    if entry is not None:
+                        entry.size = end - offset
+                        entry.digest = hashlib.blake2b(
+                            data_view[offset:end], digest_size=16
+                        ).digest()
+                        entry.dirty = False
+            data_view[size:] = self.fevent_footer
+            file.write(data)
         finally:
             if close_file:
                 file.close()
 
-    def save_overlay6(
-        self, file: typing.BinaryIO | str = "data/overlay.dec/overlay_0006.dec.bin"
-    ) -> None:
-        close_file = False
-        if isinstance(file, str):
-            file = open(file, "r+b")
-            close_file = True
+        self.fevent_source = destination
+        self._fevent_loaded_footer = self.fevent_footer
+        if self.fevent_chunk_cache is not None:
+            self.fevent_chunk_cache.update_size()
+        else:
+            self._fevent_loaded_chunks = [
+                (chunk, data_view[offset:end])
+                for chunk, (offset, end) in zip(flat_chunks, chunk_ranges)
+            ]
+            self._fevent_dirty_chunks = set()
 
-        try:
-            overlay6_raw = bytearray(file.read())
+    def _serialize_fevent_chunks_parallel(
+        self, chunks: dict[int, FEventChunk], workers: int
+    ) -> dict[int, bytes]:
+        global _forked_fevent_chunks
 
-            self.save_command_parameter_metadata_table(
-                overlay6_raw,
-                FEVENT_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS,
-                FEVENT_NUMBER_OF_COMMANDS,
+        if len(chunks) <= 0:
+            return {}
+
+        # Forked workers inherit the chunks, so only the results are pickled.
+        if (
+            "fork" in multiprocessing.get_all_start_methods()
+            and threading.active_count() <= 1
+        ):
+            indices = list(chunks)
+            batches = self._split_batches(indices, workers)
+            _forked_fevent_chunks = (self, chunks)
+            try:
+                with concurrent.futures.ProcessPoolExecutor(
+                    workers, mp_context=multiprocessing.get_context("fork")
+                ) as executor:
+                    return dict(
+                        zip(
+                            indices,
+                            itertools.chain.from_iterable(
+                                executor.map(_serialize_forked_fevent_chunks, batches)
+                            ),
+                        )
+                    )
+            finally:
+                _forked_fevent_chunks = None
+
+        serialized_chunks: dict[int, bytes] = {}
+        pickled_indices: list[int] = []
+        for index, chunk in chunks.items():
+            if isinstance(chunk, FEventScript) and chunk.is_lazy:
+                serialized_chunks[index] = chunk.to_bytes(self)
+            else:
+                pickled_indices.append(index)
+        with concurrent.futures.ProcessPoolExecutor(
+            workers, mp_context=_get_fevent_mp_context()
+        ) as executor:
+            serialized_chunks.update(
+                zip(
+                    pickled_indices,
+                    itertools.chain.from_iterable(
+                        executor.map(
+                            _serialize_fevent_chunks,
+                            itertools.repeat(self.command_parameter_metadata_table),
+                            [
+                                [chunks[index] for index in batch]
+                                for batch in self._split_batches(
+                                    pickled_indices, workers
+                                )
+                            ],
+                        )
+                    ),
+                )
             )
+        return serialized_chunks
 
-            file.seek(0)
-            file.truncate()
-            file.write(overlay6_raw)
-        finally:
-            if close_file:
-                file.close()
+    @staticmethod
+    def _split_batches(indices: list[int], workers: int) -> list[list[int]]:
+        batch_size = max(math.ceil(len(indices) / (workers * 4)), 1)
+        return [
+            indices[start : start + batch_size]
+            for start in range(0, len(indices), batch_size)
+        ]
 
-    def save_fevent(
-        self, file: typing.BinaryIO | str = "data/data/FEvent/FEvent.dat"
+    def _is_fevent_source(self, file: typing.BinaryIO | str) -> bool:
+        expected_size = self.fevent_footer_offset + len(
+            typing.cast(bytes, self._fevent_loaded_footer)
+        )
+        if isinstance(file, str):
+            return (
+                isinstance(self.fevent_source, str)
+                and os.path.isfile(file)
+                and os.path.samefile(file, self.fevent_source)
+                and os.path.getsize(file) == expected_size
+            )
+        return file is self.fevent_source and file.seek(0, os.SEEK_END) == expected_size
+
+    def _patch_fevent(
+        self,
+        file: typing.BinaryIO | str,
+        modified_chunks: dict[int, FEventChunk | bytes | None],
+        flat_chunks: list[FEventChunk | None],
     ) -> None:
         close_file = False
         if isinstance(file, str):
-            file = open(file, "wb")
+            file = open(file, "r+b")
             close_file = True
 
         try:
-            self.fevent_offset_table = []
-            for triple in self.fevent_chunks:
-                offset_triple: tuple[int, ...] = ()
-                for chunk in triple:
-                    offset_triple += (file.tell(),)
-                    if chunk is not None:
-                        file.write(chunk.to_bytes(self))
-                self.fevent_offset_table.append(
-                    typing.cast(tuple[int, int, int], offset_triple)
-                )
+            for index, chunk in sorted(modified_chunks.items()):
+                if chunk is None:
+                    continue
+                chunk_data = chunk if isinstance(chunk, bytes) else chunk.to_bytes(self)
+                offset, _ = self.get_fevent_chunk_range(index)
+                file.seek(offset)
+                file.write(chunk_data)
 
-            self.fevent_footer_offset = file.tell()
-            file.write(self.fevent_footer)
+                if self.fevent_chunk_cache is not None:
+                    entry = self.fevent_chunk_cache.peek(index)
+                    if entry is not None:
+                        entry.digest = hashlib.blake2b(
+                            chunk_data, digest_size=16
+                        ).digest()
+                        entry.dirty = False
+                else:
+                    typing.cast(
+                        list[tuple[FEventChunk | None, bytes | memoryview]],
+                        self._fevent_loaded_chunks,
+                    )[index] = (flat_chunks[index], chunk_data)
+            if self.fevent_footer != self._fevent_loaded_footer:
+                file.seek(self.fevent_footer_offset)
+                file.write(self.fevent_footer)
+            file.seek(0, os.SEEK_END)
         finally:
             if close_file:
                 file.close()
 
-    def save_all(self) -> None:
+        self._fevent_loaded_footer = self.fevent_footer
+        self._fevent_dirty_chunks = set()
+
+    def save_all(self, atomic: bool = False) -> None:
         self.save_fevent()
-        self.save_overlay6()
-        self.save_overlay3()
+        self.save_overlay6(atomic=atomic)
+        self.save_overlay3(atomic=atomic)
+
+    async def aload_all(
+        self,
+        workers: int | None = None,
+        cache_directory: str | os.PathLike[str] | None = None,
+        overlay3: str = "data/overlay.dec/overlay_0003.dec.bin",
+        overlay6: str = "data/overlay.dec/overlay_0006.dec.bin",
+        fevent: str = "data/data/FEvent/FEvent.dat",
+    ) -> None:
+        manager = type(self)(load=False)
+        await asyncio.to_thread(
+            manager.load_all, workers, cache_directory, overlay3, overlay6, fevent
+        )
+        vars(self).update(vars(manager))
+
+    async def asave_all(self, atomic: bool = False) -> None:
+        await to_thread_shielded(self.save_all, atomic)
+
+
+def iter_fevent_chunks(
+    overlay3: typing.BinaryIO | str = "data/overlay.dec/overlay_0003.dec.bin",
+    overlay6: typing.BinaryIO | str = "data/overlay.dec/overlay_0006.dec.bin",
+    fevent: typing.BinaryIO | str = "data/data/FEvent/FEvent.dat",
+    predicate: typing.Callable[[int, bytes], bool] | None = None,
+) -> typing.Iterator[tuple[int, FEventChunk]]:
+    manager = FEventScriptManager(load=False)
+    manager.load_overlay3(overlay3)
+    manager.load_overlay6(overlay6)
+
+    close_file = False
+    if isinstance(fevent, str):
+        fevent = open(fevent, "rb")
+        close_file = True
+
+    try:
+        for index in range(len(manager.fevent_offset_table) * 3):
+            offset, end = manager.get_fevent_chunk_range(index)
+            if end <= offset:
+                continue
+            fevent.seek(offset)
+            data = fevent.read(end - offset)
+            if predicate is not None and not predicate(index, data):
+                continue
+            chunk = parse_fevent_chunk(manager, data, index)
+            if chunk is not None:
+                yield index, chunk
+    finally:
+        if close_file:
+            fevent.close()
 
 
 class BattleScriptManager(MnLScriptManager):
@@ -267,49 +1050,42 @@ class BattleScriptManager(MnLScriptManager):
             self.load_all()
 
     def load_overlay12(
-        self, file: typing.BinaryIO | str = "data/overlay.dec/overlay_0012.dec.bin"
+        self,
+        file: typing.BinaryIO | str | collections.abc.Buffer = (
+            "data/overlay.dec/overlay_0012.dec.bin"
+        ),
     ) -> None:
-        close_file = False
-        if isinstance(file, str):
-            file = open(file, "rb")
-            close_file = True
-
-        try:
-            file.seek(BATTLE_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS)
-            self.load_command_parameter_metadata_table(file, BATTLE_NUMBER_OF_COMMANDS)
-        finally:
-            if close_file:
-                file.close()
+        with open_buffer(file) as data:
+            self.load_command_parameter_metadata_table(
+                data[BATTLE_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS:],
+                BATTLE_NUMBER_OF_COMMANDS,
+            )
 
     def load_all(self) -> None:
         self.load_overlay12()
 
     def save_overlay12(
-        self, file: typing.BinaryIO | str = "data/overlay.dec/overlay_0012.dec.bin"
+        self,
+        file: typing.BinaryIO | str = "data/overlay.dec/overlay_0012.dec.bin",
+        atomic: bool = False,
     ) -> None:
-        close_file = False
-        if isinstance(file, str):
-            file = open(file, "r+b")
-            close_file = True
-
-        try:
-            overlay12_raw = bytearray(file.read())
+        self.patch_command_parameter_metadata_table(
+            file,
+            BATTLE_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS,
+            BATTLE_NUMBER_OF_COMMANDS,
+            atomic,
+        )
 
-            self.save_command_parameter_metadata_table(
-                overlay12_raw,
-                BATTLE_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS,
-                BATTLE_NUMBER_OF_COMMANDS,
-            )
+    def save_all(self, atomic: bool = False) -> None:
+        self.save_overlay12(atomic=atomic)
 
-            file.seek(0)
-            file.truncate()
-            file.write(overlay12_raw)
-        finally:
-            if close_file:
-                file.close()
+    async def aload_all(self) -> None:
+        manager = type(self)(load=False)
+        await asyncio.to_thread(manager.load_all)
+        vars(self).update(vars(manager))
 
-    def save_all(self) -> None:
-        self.save_overlay12()
+    async def asave_all(self, atomic: bool = False) -> None:
+        await to_thread_shielded(self.save_all, atomic)
 
 
 class MenuScriptManager(MnLScriptManager):
@@ -319,49 +1095,42 @@ class MenuScriptManager(MnLScriptManager):
             self.load_all()
 
     def load_overlay123(
-        self, file: typing.BinaryIO | str = "data/overlay.dec/overlay_0123.dec.bin"
+        self,
+        file: typing.BinaryIO | str | collections.abc.Buffer = (
+            "data/overlay.dec/overlay_0123.dec.bin"
+        ),
     ) -> None:
-        close_file = False
-        if isinstance(file, str):
-            file = open(file, "rb")
-            close_file = True
-
-        try:
-            file.seek(MENU_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS)
-            self.load_command_parameter_metadata_table(file, MENU_NUMBER_OF_COMMANDS)
-        finally:
-            if close_file:
-                file.close()
+        with open_buffer(file) as data:
+            self.load_command_parameter_metadata_table(
+                data[MENU_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS:],
+                MENU_NUMBER_OF_COMMANDS,
+            )
 
     def load_all(self) -> None:
         self.load_overlay123()
 
     def save_overlay123(
-        self, file: typing.BinaryIO | str = "data/overlay.dec/overlay_0123.dec.bin"
+        self,
+        file: typing.BinaryIO | str = "data/overlay.dec/overlay_0123.dec.bin",
+        atomic: bool = False,
     ) -> None:
-        close_file = False
-        if isinstance(file, str):
-            file = open(file, "r+b")
-            close_file = True
+        self.patch_command_parameter_metadata_table(
+            file,
+            MENU_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS,
+            MENU_NUMBER_OF_COMMANDS,
+            atomic,
+        )
 
-        try:
-            overlay123_raw = bytearray(file.read())
+    def save_all(self, atomic: bool = False) -> None:
+        self.save_overlay123(atomic=atomic)
 
-            self.save_command_parameter_metadata_table(
-                overlay123_raw,
-                MENU_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS,
-                MENU_NUMBER_OF_COMMANDS,
-            )
+    async def aload_all(self) -> None:
+        manager = type(self)(load=False)
+        await asyncio.to_thread(manager.load_all)
+        vars(self).update(vars(manager))
 
-            file.seek(0)
-            file.truncate()
-            file.write(overlay123_raw)
-        finally:
-            if close_file:
-                file.close()
-
-    def save_all(self) -> None:
-        self.save_overlay123()
+    async def asave_all(self, atomic: bool = False) -> None:
+        await to_thread_shielded(self.save_all, atomic)
 
 
 class ShopScriptManager(MnLScriptManager):
@@ -371,46 +1140,39 @@ class ShopScriptManager(MnLScriptManager):
             self.load_all()
 
     def load_overlay124(
-        self, file: typing.BinaryIO | str = "data/overlay.dec/overlay_0124.dec.bin"
+        self,
+        file: typing.BinaryIO | str | collections.abc.Buffer = (
+            "data/overlay.dec/overlay_0124.dec.bin"
+        ),
     ) -> None:
-        close_file = False
-        if isinstance(file, str):
-            file = open(file, "rb")
-            close_file = True
-
-        try:
-            file.seek(SHOP_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS)
-            self.load_command_parameter_metadata_table(file, SHOP_NUMBER_OF_COMMANDS)
-        finally:
-            if close_file:
-                file.close()
+        with open_buffer(file) as data:
+            self.load_command_parameter_metadata_table(
+                data[SHOP_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS:],
+                SHOP_NUMBER_OF_COMMANDS,
+            )
 
     def load_all(self) -> None:
         self.load_overlay124()
 
     def save_overlay124(
-        self, file: typing.BinaryIO | str = "data/overlay.dec/overlay_0124.dec.bin"
+        self,
+        file: typing.BinaryIO | str = "data/overlay.dec/overlay_0124.dec.bin",
+        atomic: bool = False,
     ) -> None:
-        close_file = False
-        if isinstance(file, str):
-            file = open(file, "r+b")
-            close_file = True
-
-        try:
-            overlay124_raw = bytearray(file.read())
+        self.patch_command_parameter_metadata_table(
+            file,
+            SHOP_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS,
+            SHOP_NUMBER_OF_COMMANDS,
+            atomic,
+        )
 
-            self.save_command_parameter_metadata_table(
-                overlay124_raw,
-                SHOP_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS,
-                SHOP_NUMBER_OF_COMMANDS,
-            )
+    def save_all(self, atomic: bool = False) -> None:
+        self.save_overlay124(atomic=atomic)
 
-            file.seek(0)
-            file.truncate()
-            file.write(overlay124_raw)
-        finally:
-            if close_file:
-                file.close()
+    async def aload_all(self) -> None:
+        manager = type(self)(load=False)
+        await asyncio.to_thread(manager.load_all)
+        vars(self).update(vars(manager))
 
-    def save_all(self) -> None:
-        self.save_overlay124()
+    async def asave_all(self, atomic: bool = False) -> None:
+        await to_thread_shielded(self.save_all, atomic)
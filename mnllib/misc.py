@@ -2,8 +2,11 @@ from __future__ import annotations
 
 import abc
 import struct
+import collections.abc
 import typing
 
+from .utils import write_bytes_into
+
 if typing.TYPE_CHECKING:
     from .managers import MnLScriptManager
 
@@ -17,6 +20,14 @@ class FEventChunk(abc.ABC):
     def to_bytes(self, manager: MnLScriptManager) -> bytes:
         pass
 
+    def size_of(self, manager: MnLScriptManager) -> int:
+        return len(self.to_bytes(manager))
+
+    def write_into(
+        self, buffer: bytearray | memoryview, offset: int, manager: MnLScriptManager
+    ) -> int:
+        return write_bytes_into(buffer, offset, self.to_bytes(manager))
+
 
 def decode_varint(stream: typing.BinaryIO) -> int:
     (data,) = struct.unpack("<B", stream.read(1))
@@ -40,15 +51,22 @@ def encode_varint(value: int) -> bytearray:
     return result
 
 
+def is_fevent_language_table(data: collections.abc.Buffer) -> bool:
+    return len(memoryview(data)) >= 4 and struct.unpack_from("<I", data)[0] == 0x128
+
+
 def parse_fevent_chunk(
-    manager: MnLScriptManager, data: bytes, index: int | None = None
+    manager: MnLScriptManager,
+    data: collections.abc.Buffer,
+    index: int | None = None,
+    lazy: bool = False,
 ) -> FEventChunk | None:
     from .script import FEventScript
     from .text import LanguageTable
 
-    if len(data) == 0:
+    if len(memoryview(data)) == 0:
         return None
-    elif struct.unpack_from("<I", data)[0] == 0x128:
+    elif is_fevent_language_table(data):
         return LanguageTable.from_bytes(data, is_dialog=True, index=index)
     else:
-        return FEventScript.from_bytes(manager, data, index)
+        return FEventScript.from_bytes(manager, data, index, lazy)
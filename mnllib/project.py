@@ -0,0 +1,206 @@
+import os
+import asyncio
+import pathlib
+import concurrent.futures
+import typing
+
+from .managers import (
+    BattleScriptManager,
+    FEventScriptManager,
+    MenuScriptManager,
+    MnLScriptManager,
+    ShopScriptManager,
+)
+from .utils import to_thread_shielded
+
+
+def _metadata_table_bytes(manager: MnLScriptManager) -> bytes:
+    return b"".join(
+        [
+            parameter_metadata.to_bytes()
+            for parameter_metadata in manager.command_parameter_metadata_table
+        ]
+    )
+
+
+class ScriptProject:
+    data_directory: pathlib.Path
+    fevent_manager: FEventScriptManager
+    battle_manager: BattleScriptManager
+    menu_manager: MenuScriptManager
+    shop_manager: ShopScriptManager
+
+    _saved_overlay_states: dict[int, typing.Any]
+
+    def __init__(
+        self,
+        data_directory: str | os.PathLike[str] = "data",
+        load: bool = True,
+        workers: int | None = None,
+        cache_directory: str | os.PathLike[str] | None = None,
+    ) -> None:
+        self.data_directory = pathlib.Path(data_directory)
+        self.fevent_manager = FEventScriptManager(load=False)
+        self.battle_manager = BattleScriptManager(load=False)
+        self.menu_manager = MenuScriptManager(load=False)
+        self.shop_manager = ShopScriptManager(load=False)
+        self._saved_overlay_states = {}
+        if load:
+            self.load_all(workers, cache_directory)
+
+    def get_overlay_path(self, number: int) -> str:
+        return str(self.data_directory / "overlay.dec" / f"overlay_{number:04}.dec.bin")
+
+    @property
+    def fevent_path(self) -> str:
+        return str(self.data_directory / "data" / "FEvent" / "FEvent.dat")
+
+    def _get_overlay_states(self) -> dict[int, typing.Any]:
+        return {
+            3: (
+                list(self.fevent_manager.fevent_offset_table),
+                self.fevent_manager.fevent_footer_offset,
+            ),
+            6: _metadata_table_bytes(self.fevent_manager),
+            12: _metadata_table_bytes(self.battle_manager),
+            123: _metadata_table_bytes(self.menu_manager),
+            124: _metadata_table_bytes(self.shop_manager),
+        }
+
+    def _load_managers(
+        self,
+        workers: int | None,
+        cache_directory: str | os.PathLike[str] | None,
+    ) -> tuple[
+        FEventScriptManager, BattleScriptManager, MenuScriptManager, ShopScriptManager
+    ]:
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        fevent_manager = FEventScriptManager(load=False)
+        battle_manager = BattleScriptManager(load=False)
+        menu_manager = MenuScriptManager(load=False)
+        shop_manager = ShopScriptManager(load=False)
+
+        def load_fevent() -> None:
+            fevent_manager.load_all(
+                workers,
+                cache_directory,
+                overlay3=self.get_overlay_path(3),
+                overlay6=self.get_overlay_path(6),
+                fevent=self.fevent_path,
+            )
+
+        # The process pool that parses FEvent.dat can only fork once the
+        # threads are done, so it is started afterwards.
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            futures = [
+                executor.submit(
+                    battle_manager.load_overlay12, self.get_overlay_path(12)
+                ),
+                executor.submit(
+                    menu_manager.load_overlay123, self.get_overlay_path(123)
+                ),
+                executor.submit(
+                    shop_manager.load_overlay124, self.get_overlay_path(124)
+                ),
+            ]
+            if workers == 1:
+                futures.append(executor.submit(load_fevent))
+            for future in futures:
+                future.result()
+        if workers != 1:
+            load_fevent()
+
+        return fevent_manager, battle_manager, menu_manager, shop_manager
+
+    def _set_managers(
+        self,
+        managers: tuple[
+            FEventScriptManager,
+            BattleScriptManager,
+            MenuScriptManager,
+            ShopScriptManager,
+        ],
+    ) -> None:
+        (
+            self.fevent_manager,
+            self.battle_manager,
+            self.menu_manager,
+            self.shop_manager,
+        ) = managers
+        self._saved_overlay_states = self._get_overlay_states()
+
+    def load_all(
+        self,
+        workers: int | None = None,
+        cache_directory: str | os.PathLike[str] | None = None,
+    ) -> None:
+        self._set_managers(self._load_managers(workers, cache_directory))
+
+    async def aload_all(
+        self,
+        workers: int | None = None,
+        cache_directory: str | os.PathLike[str] | None = None,
+    ) -> None:
+        self._set_managers(
+            await asyncio.to_thread(self._load_managers, workers, cache_directory)
+        )
+
+    def _save_fevent(
+        self, atomic: bool, detect_changes: bool, workers: int | None
+    ) -> None:
+        self.fevent_manager.save_fevent(self.fevent_path, detect_changes, workers)
+        overlay3_state = self._get_overlay_states()[3]
+        if overlay3_state != self._saved_overlay_states.get(3):
+            self.fevent_manager.save_overlay3(self.get_overlay_path(3), atomic)
+            self._saved_overlay_states[3] = overlay3_state
+
+    def _save_overlay(
+        self,
+        number: int,
+        save: typing.Callable[[str, bool], None],
+        state: typing.Any,
+        atomic: bool,
+    ) -> None:
+        save(self.get_overlay_path(number), atomic)
+        self._saved_overlay_states[number] = state
+
+    def save_all(
+        self,
+        atomic: bool = False,
+        detect_changes: bool = True,
+        workers: int | None = None,
+    ) -> None:
+        overlay_states = self._get_overlay_states()
+        overlay_savers: dict[int, typing.Callable[[str, bool], None]] = {
+            6: self.fevent_manager.save_overlay6,
+            12: self.battle_manager.save_overlay12,
+            123: self.menu_manager.save_overlay123,
+            124: self.shop_manager.save_overlay124,
+        }
+        forks = workers is not None and workers != 1
+        with concurrent.futures.ThreadPoolExecutor(len(overlay_savers) + 1) as executor:
+            futures = [
+                executor.submit(
+                    self._save_overlay, number, save, overlay_states[number], atomic
+                )
+                for number, save in overlay_savers.items()
+                if overlay_states[number] != self._saved_overlay_states.get(number)
+            ]
+            if not forks:
+                futures.append(
+                    executor.submit(self._save_fevent, atomic, detect_changes, workers)
+                )
+            for future in futures:
+                future.result()
+        if forks:
+            self._save_fevent(atomic, detect_changes, workers)
+
+    async def asave_all(
+        self,
+        atomic: bool = False,
+        detect_changes: bool = True,
+        workers: int | None = None,
+    ) -> None:
+        await to_thread_shielded(self.save_all, atomic, detect_changes, workers)
@@ -1,14 +1,18 @@
 from __future__ import annotations
 
-import os
 import struct
-import io
 import warnings
+import itertools
+import collections.abc
 import typing
 
-from .consts import COMMAND_PARAMETER_STRUCT_MAP
+from .consts import (
+    COMMAND_HEADER_STRUCT,
+    COMMAND_PARAMETER_METADATA_STRUCT,
+    COMMAND_PARAMETER_STRUCT_MAP,
+)
 from .misc import FEventChunk, MnLLibWarning
-from .utils import read_length_prefixed_array
+from .utils import unpack_length_prefixed_array, write_bytes_into
 
 if typing.TYPE_CHECKING:
     from .managers import MnLScriptManager
@@ -83,43 +87,68 @@ class Command:
     def from_stream(
         cls, manager: MnLScriptManager, stream: typing.BinaryIO
     ) -> typing.Self:
-        command_id: int
-        (command_id,) = struct.unpack("<H", stream.read(2))
+        header = stream.read(COMMAND_HEADER_STRUCT.size)
+        command_id, param_variables_bitfield = COMMAND_HEADER_STRUCT.unpack(header)
         if command_id >= len(manager.command_parameter_metadata_table):
             raise InvalidCommandIDError(command_id)
-        (param_variables_bitfield,) = struct.unpack("<I", stream.read(4))
 
-        param_metadata = manager.command_parameter_metadata_table[command_id]
-        if param_metadata.has_return_value:
-            result_variable = Variable.from_bytes(stream.read(2))
-        else:
-            result_variable = None
-        arguments: list[int | Variable] = []
-        for i, param_type in enumerate(param_metadata.parameter_types):
-            if param_variables_bitfield & (1 << i):
-                arguments.append(Variable.from_bytes(stream.read(2)))
-            else:
-                if param_type >= len(COMMAND_PARAMETER_STRUCT_MAP):
-                    raise InvalidCommandParameterTypeError(param_type)
-                arguments.append(
-                    COMMAND_PARAMETER_STRUCT_MAP[param_type].unpack(
-                        stream.read(COMMAND_PARAMETER_STRUCT_MAP[param_type].size)
-                    )[0]
+        command_format = manager.get_command_format(
+            command_id, param_variables_bitfield
+        )
+        return cls.from_values(
+            command_format,
+            command_format.command_struct.unpack(
+                header
+                + stream.read(
+                    command_format.command_struct.size - COMMAND_HEADER_STRUCT.size
                 )
+            ),
+        )
+
+    @classmethod
+    def from_buffer(
+        cls,
+        manager: MnLScriptManager,
+        buffer: collections.abc.Buffer,
+        offset: int = 0,
+    ) -> tuple[typing.Self, int]:
+        command_id, param_variables_bitfield = COMMAND_HEADER_STRUCT.unpack_from(
+            buffer, offset
+        )
+        if command_id >= len(manager.command_parameter_metadata_table):
+            raise InvalidCommandIDError(command_id)
+
+        command_format = manager.get_command_format(
+            command_id, param_variables_bitfield
+        )
+        return (
+            cls.from_values(
+                command_format,
+                command_format.command_struct.unpack_from(buffer, offset),
+            ),
+            command_format.command_struct.size,
+        )
 
-        return cls(command_id, arguments, result_variable)
+    @classmethod
+    def from_values(
+        cls, command_format: CommandFormat, values: tuple[int, ...]
+    ) -> typing.Self:
+        arguments: list[int | Variable] = list(values[command_format.arguments_start :])
+        for i in command_format.variable_indices:
+            arguments[i] = Variable(typing.cast(int, arguments[i]))
 
-    def to_bytes(self, manager: MnLScriptManager) -> bytes:
-        data_io = io.BytesIO()
+        return cls(
+            command_format.command_id,
+            arguments,
+            Variable(values[2]) if command_format.has_return_value else None,
+        )
 
+    def get_format(self, manager: MnLScriptManager) -> CommandFormat:
         param_variables_bitfield = 0
         for i, argument in enumerate(self.arguments):
             if isinstance(argument, Variable):
                 param_variables_bitfield |= 1 << i
-        data_io.write(struct.pack("<HI", self.command_id, param_variables_bitfield))
 
-        if self.result_variable is not None:
-            data_io.write(self.result_variable.to_bytes())
         param_metadata = manager.command_parameter_metadata_table[self.command_id]
         if len(param_metadata.parameter_types) != len(self.arguments):
             raise ValueError(
@@ -127,15 +156,44 @@ class Command:
                 f"command (0x{self.command_id:04X}) doesn't match that specified by "
                 f"the metadata ({len(param_metadata.parameter_types)})"
             )
-        for param_type, argument in zip(param_metadata.parameter_types, self.arguments):
-            if isinstance(argument, Variable):
-                data_io.write(argument.to_bytes())
-            else:
-                if param_type >= len(COMMAND_PARAMETER_STRUCT_MAP):
-                    raise InvalidCommandParameterTypeError(param_type)
-                data_io.write(COMMAND_PARAMETER_STRUCT_MAP[param_type].pack(argument))
+        return manager.get_command_format(
+            self.command_id, param_variables_bitfield, self.result_variable is not None
+        )
+
+    def size_of(self, manager: MnLScriptManager) -> int:
+        return self.get_format(manager).command_struct.size
+
+    def write_into(
+        self, buffer: bytearray | memoryview, offset: int, manager: MnLScriptManager
+    ) -> int:
+        command_format = self.get_format(manager)
+        arguments = [
+            argument.number if isinstance(argument, Variable) else argument
+            for argument in self.arguments
+        ]
+        if self.result_variable is not None:
+            command_format.command_struct.pack_into(
+                buffer,
+                offset,
+                self.command_id,
+                command_format.param_variables_bitfield,
+                self.result_variable.number,
+                *arguments,
+            )
+        else:
+            command_format.command_struct.pack_into(
+                buffer,
+                offset,
+                self.command_id,
+                command_format.param_variables_bitfield,
+                *arguments,
+            )
+        return offset + command_format.command_struct.size
 
-        return data_io.getvalue()
+    def to_bytes(self, manager: MnLScriptManager) -> bytes:
+        data = bytearray(self.size_of(manager))
+        self.write_into(memoryview(data), 0, manager)
+        return bytes(data)
 
 
 class Subroutine:
@@ -150,27 +208,95 @@ class Subroutine:
     def from_stream(
         cls, manager: MnLScriptManager, stream: typing.BinaryIO
     ) -> typing.Self:
-        footer = b""
-        commands: list[Command] = []
-        while stream.read(1) != b"":
-            stream.seek(-1, os.SEEK_CUR)
-            old_offset = stream.tell()
-            try:
-                commands.append(Command.from_stream(manager, stream))
-            except (struct.error, InvalidCommandIDError):
-                stream.seek(old_offset)
-                footer = stream.read()
+        return cls.from_buffer(manager, stream.read())
+
+    @classmethod
+    def from_buffer(
+        cls,
+        manager: MnLScriptManager,
+        buffer: collections.abc.Buffer,
+        offset: int = 0,
+        end: int | None = None,
+    ) -> typing.Self:
+        data_view = memoryview(buffer)[:end]
+        command_offsets, footer_offset = cls.scan_commands(manager, data_view, offset)
+        return cls(
+            [
+                Command.from_values(
+                    command_format,
+                    command_format.command_struct.unpack_from(
+                        data_view, command_offset
+                    ),
+                )
+                for command_offset, command_format in command_offsets
+            ],
+            bytes(data_view[footer_offset:]),
+        )
+
+    @classmethod
+    def scan_commands(
+        cls,
+        manager: MnLScriptManager,
+        buffer: collections.abc.Buffer,
+        offset: int = 0,
+        end: int | None = None,
+    ) -> tuple[list[tuple[int, CommandFormat]], int]:
+        data_view = memoryview(buffer)[:end]
+        end = len(data_view)
+        number_of_commands = len(manager.command_parameter_metadata_table)
+        command_offsets: list[tuple[int, CommandFormat]] = []
+        while offset + COMMAND_HEADER_STRUCT.size <= end:
+            command_id, param_variables_bitfield = COMMAND_HEADER_STRUCT.unpack_from(
+                data_view, offset
+            )
+            if command_id >= number_of_commands:
                 break
-        return cls(commands, footer)
+            command_format = manager.get_command_format(
+                command_id, param_variables_bitfield
+            )
+            if offset + command_format.command_struct.size > end:
+                break
+            command_offsets.append((offset, command_format))
+            offset += command_format.command_struct.size
+        return command_offsets, offset
 
-    def to_bytes(self, manager: MnLScriptManager) -> bytes:
-        data_io = io.BytesIO()
+    @classmethod
+    def command_offsets(
+        cls,
+        manager: MnLScriptManager,
+        buffer: collections.abc.Buffer,
+        offset: int = 0,
+        end: int | None = None,
+    ) -> tuple[list[int], int]:
+        command_offsets, footer_offset = cls.scan_commands(manager, buffer, offset, end)
+        return [command_offset for command_offset, _ in command_offsets], footer_offset
+
+    @classmethod
+    def count_commands(
+        cls,
+        manager: MnLScriptManager,
+        buffer: collections.abc.Buffer,
+        offset: int = 0,
+        end: int | None = None,
+    ) -> int:
+        return len(cls.scan_commands(manager, buffer, offset, end)[0])
+
+    def size_of(self, manager: MnLScriptManager) -> int:
+        return sum(command.size_of(manager) for command in self.commands) + len(
+            self.footer
+        )
 
+    def write_into(
+        self, buffer: bytearray | memoryview, offset: int, manager: MnLScriptManager
+    ) -> int:
         for command in self.commands:
-            data_io.write(command.to_bytes(manager))
-        data_io.write(self.footer)
+            offset = command.write_into(buffer, offset, manager)
+        return write_bytes_into(buffer, offset, self.footer)
 
-        return data_io.getvalue()
+    def to_bytes(self, manager: MnLScriptManager) -> bytes:
+        data = bytearray(self.size_of(manager))
+        self.write_into(memoryview(data), 0, manager)
+        return bytes(data)
 
 
 class FEventScriptHeader:
@@ -228,30 +354,55 @@ class FEventScriptHeader:
         stream: typing.BinaryIO,
         index: int | None = None,
     ) -> typing.Self:
-        unk_0x00 = stream.read(12)
-        section1_offset, section2_offset, section3_offset = struct.unpack(
-            "<III", stream.read(4 * 3)
-        )
-        offsets_unk1 = stream.read(section1_offset - stream.tell())
+        start_offset = stream.tell()
+        header, size = cls.from_buffer(manager, stream.read(), 0, index)
+        stream.seek(start_offset + size)
+        return header
 
-        (array1_length_plus_one,) = struct.unpack("<I", stream.read(4))
-        array1 = [
-            struct.unpack("<I", stream.read(4))[0]
-            for _ in range(array1_length_plus_one - 1)
-        ]
-        (var1,) = struct.unpack("<I", stream.read(4))
-        (array2_length_plus_one,) = struct.unpack("<I", stream.read(4))
-        array2 = [
-            struct.unpack("<I", stream.read(4))[0]
-            for _ in range(array2_length_plus_one - 1)
-        ]
-        (var2,) = struct.unpack("<I", stream.read(4))
-        array3 = read_length_prefixed_array(stream, "<H", "<H")
-        section1_unk1 = stream.read(section2_offset - stream.tell())
+    @classmethod
+    def from_buffer(
+        cls,
+        manager: MnLScriptManager,
+        buffer: collections.abc.Buffer,
+        offset: int = 0,
+        index: int | None = None,
+    ) -> tuple[typing.Self, int]:
+        data_view = memoryview(buffer)
+        unk_0x00 = bytes(data_view[offset : offset + 12])
+        section1_offset, section2_offset, section3_offset = struct.unpack_from(
+            "<III", data_view, offset + 12
+        )
+        section1_offset += offset
+        section2_offset += offset
+        section3_offset += offset
+        offsets_unk1 = bytes(data_view[offset + 4 * 6 : section1_offset])
+
+        position = section1_offset
+        (array1_length_plus_one,) = struct.unpack_from("<I", data_view, position)
+        array1 = list(
+            struct.unpack_from(
+                f"<{array1_length_plus_one - 1}I", data_view, position + 4
+            )
+        )
+        position += array1_length_plus_one * 4
+        var1, array2_length_plus_one = struct.unpack_from("<II", data_view, position)
+        array2 = list(
+            struct.unpack_from(
+                f"<{array2_length_plus_one - 1}I", data_view, position + 8
+            )
+        )
+        position += (1 + array2_length_plus_one) * 4
+        (var2,) = struct.unpack_from("<I", data_view, position)
+        array3, position = unpack_length_prefixed_array(
+            data_view, position + 4, "<H", "<H"
+        )
+        section1_unk1 = bytes(data_view[position:section2_offset])
 
-        array4 = read_length_prefixed_array(stream, "<IIIII")
+        array4, position = unpack_length_prefixed_array(
+            data_view, section2_offset, "<IIIII"
+        )
 
-        if stream.tell() != section3_offset:
+        if position != section3_offset:
             warnings.warn(
                 f"There are extra bytes between the 2nd and 3rd section of the {
                     f"header of script {index}"
@@ -260,53 +411,54 @@ class FEventScriptHeader:
                 }!",
                 MnLLibWarning,
             )
-            stream.seek(section3_offset)
-        array5 = read_length_prefixed_array(stream, "<H", "<H")
+        array5, position = unpack_length_prefixed_array(
+            data_view, section3_offset, "<H", "<H"
+        )
         subroutine_table: list[int] = []
         post_table_subroutine = Subroutine([])
         while (
-            (stream.tell() - section3_offset < subroutine_table[0])
+            (position - section3_offset < subroutine_table[0])
             if len(subroutine_table) > 0
             else True
         ):
-            (offset,) = struct.unpack("<H", stream.read(2))
-            if len(subroutine_table) > 0 and offset < subroutine_table[-1]:
-                stream.seek(-2, os.SEEK_CUR)
-                post_table_subroutine = Subroutine.from_stream(
-                    manager,
-                    io.BytesIO(
-                        stream.read(
-                            subroutine_table[0] - stream.tell() + section3_offset
-                        )
-                    ),
+            (subroutine_offset,) = struct.unpack_from("<H", data_view, position)
+            if len(subroutine_table) > 0 and subroutine_offset < subroutine_table[-1]:
+                end = section3_offset + subroutine_table[0]
+                post_table_subroutine = Subroutine.from_buffer(
+                    manager, data_view, position, end
                 )
+                position = min(end, len(data_view))
                 break
-            subroutine_table.append(offset)
-        subroutine_base_offset = stream.tell() - section3_offset
+            subroutine_table.append(subroutine_offset)
+            position += 2
+        subroutine_base_offset = position - section3_offset
         subroutine_table = [
-            offset - subroutine_base_offset for offset in subroutine_table
+            subroutine_offset - subroutine_base_offset
+            for subroutine_offset in subroutine_table
         ]
 
-        return cls(
-            index,
-            unk_0x00=unk_0x00,
-            offsets_unk1=offsets_unk1,
-            array1=array1,
-            var1=var1,
-            array2=array2,
-            var2=var2,
-            array3=array3,
-            section1_unk1=section1_unk1,
-            array4=array4,
-            array5=array5,
-            subroutine_table=subroutine_table,
-            post_table_subroutine=post_table_subroutine,
+        return (
+            cls(
+                index,
+                unk_0x00=unk_0x00,
+                offsets_unk1=offsets_unk1,
+                array1=array1,
+                var1=var1,
+                array2=array2,
+                var2=var2,
+                array3=array3,
+                section1_unk1=section1_unk1,
+                array4=array4,
+                array5=array5,
+                subroutine_table=subroutine_table,
+                post_table_subroutine=post_table_subroutine,
+            ),
+            position - offset,
         )
 
-    def to_bytes(self, manager: MnLScriptManager) -> bytes:
-        data_io = io.BytesIO()
-
-        data_io.write(self.unk_0x00)
+    def get_section_offsets(
+        self, manager: MnLScriptManager
+    ) -> tuple[int, int, int, int]:
         section1_offset = 0x18 + len(self.offsets_unk1)
         section2_offset = (
             section1_offset
@@ -316,97 +468,348 @@ class FEventScriptHeader:
             + len(self.section1_unk1)
         )
         section3_offset = section2_offset + 4 + len(self.array4) * 20
-        post_table_subroutine_raw = self.post_table_subroutine.to_bytes(manager)
         header_end_offset = (
             section3_offset
             + 2
             + len(self.array5) * 2
             + len(self.subroutine_table) * 2
-            + len(post_table_subroutine_raw)
+            + self.post_table_subroutine.size_of(manager)
+        )
+        return section1_offset, section2_offset, section3_offset, header_end_offset
+
+    def size_of(self, manager: MnLScriptManager) -> int:
+        return self.get_section_offsets(manager)[3]
+
+    def write_into(
+        self, buffer: bytearray | memoryview, offset: int, manager: MnLScriptManager
+    ) -> int:
+        section1_offset, section2_offset, section3_offset, header_end_offset = (
+            self.get_section_offsets(manager)
         )
-        data_io.write(
-            struct.pack("<III", section1_offset, section2_offset, section3_offset)
+
+        position = write_bytes_into(buffer, offset, self.unk_0x00)
+        struct.pack_into(
+            "<III", buffer, position, section1_offset, section2_offset, section3_offset
+        )
+        write_bytes_into(buffer, position + 4 * 3, self.offsets_unk1)
+
+        struct.pack_into(
+            f"<I{len(self.array1)}III{len(self.array2)}IIH{len(self.array3)}H",
+            buffer,
+            offset + section1_offset,
+            len(self.array1) + 1,
+            *self.array1,
+            self.var1,
+            len(self.array2) + 1,
+            *self.array2,
+            self.var2,
+            len(self.array3),
+            *self.array3,
+        )
+        write_bytes_into(
+            buffer,
+            offset + section2_offset - len(self.section1_unk1),
+            self.section1_unk1,
+        )
+
+        struct.pack_into(
+            f"<I{len(self.array4) * 5}I",
+            buffer,
+            offset + section2_offset,
+            len(self.array4),
+            *itertools.chain.from_iterable(self.array4),
         )
-        data_io.write(self.offsets_unk1)
-
-        data_io.write(struct.pack("<I", len(self.array1) + 1))
-        data_io.write(struct.pack(f"<{len(self.array1)}I", *self.array1))
-        data_io.write(struct.pack("<I", self.var1))
-        data_io.write(struct.pack("<I", len(self.array2) + 1))
-        data_io.write(struct.pack(f"<{len(self.array2)}I", *self.array2))
-        data_io.write(struct.pack("<I", self.var2))
-        data_io.write(struct.pack("<H", len(self.array3)))
-        data_io.write(struct.pack(f"<{len(self.array3)}H", *self.array3))
-        data_io.write(self.section1_unk1)
-
-        data_io.write(struct.pack("<I", len(self.array4)))
-        for a, b, c, d, e in self.array4:
-            data_io.write(struct.pack("<IIIII", a, b, c, d, e))
-
-        data_io.write(struct.pack("<H", len(self.array5)))
-        data_io.write(struct.pack(f"<{len(self.array5)}H", *self.array5))
+
         subroutine_base_offset = header_end_offset - section3_offset
-        for offset in self.subroutine_table:
-            data_io.write(struct.pack("<H", offset + subroutine_base_offset))
-        data_io.write(post_table_subroutine_raw)
+        struct.pack_into(
+            f"<H{len(self.array5)}H{len(self.subroutine_table)}H",
+            buffer,
+            offset + section3_offset,
+            len(self.array5),
+            *self.array5,
+            *[
+                subroutine_offset + subroutine_base_offset
+                for subroutine_offset in self.subroutine_table
+            ],
+        )
+        return self.post_table_subroutine.write_into(
+            buffer,
+            offset
+            + section3_offset
+            + (1 + len(self.array5) + len(self.subroutine_table)) * 2,
+            manager,
+        )
+
+    def to_bytes(self, manager: MnLScriptManager) -> bytes:
+        data = bytearray(self.size_of(manager))
+        self.write_into(memoryview(data), 0, manager)
+        return bytes(data)
+
+
+class LazySubroutineList(collections.abc.MutableSequence[Subroutine]):
+    manager: MnLScriptManager
+
+    _items: list[Subroutine | memoryview]
+
+    def __init__(
+        self, manager: MnLScriptManager, items: list[Subroutine | memoryview]
+    ) -> None:
+        self.manager = manager
+        self._items = items
+
+    @typing.overload
+    def __getitem__(self, index: int) -> Subroutine: ...
+
+    @typing.overload
+    def __getitem__(self, index: slice) -> list[Subroutine]: ...
+
+    def __getitem__(self, index: int | slice) -> Subroutine | list[Subroutine]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._items)))]
+
+        item = self._items[index]
+        if isinstance(item, memoryview):
+            item = Subroutine.from_buffer(self.manager, item)
+            self._items[index] = item
+        return item
+
+    @typing.overload
+    def __setitem__(self, index: int, value: Subroutine) -> None: ...
+
+    @typing.overload
+    def __setitem__(
+        self, index: slice, value: collections.abc.Iterable[Subroutine]
+    ) -> None: ...
+
+    def __setitem__(
+        self,
+        index: int | slice,
+        value: Subroutine | collections.abc.Iterable[Subroutine],
+    ) -> None:
+        if isinstance(index, slice):
+            self._items[index] = list(
+                typing.cast(collections.abc.Iterable[Subroutine], value)
+            )
+        else:
+            self._items[index] = typing.cast(Subroutine, value)
+
+    def __delitem__(self, index: int | slice) -> None:
+        del self._items[index]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def insert(self, index: int, value: Subroutine) -> None:
+        self._items.insert(index, value)
 
-        return data_io.getvalue()
+    def is_decoded(self, index: int) -> bool:
+        return not isinstance(self._items[index], memoryview)
+
+    def get_raw_items(self) -> list[Subroutine | memoryview]:
+        return self._items.copy()
 
 
 class FEventScript(FEventChunk):
     index: int | None
-    header: FEventScriptHeader
-    subroutines: list[Subroutine]
+
+    _header: FEventScriptHeader | None
+    _subroutines: collections.abc.MutableSequence[Subroutine] | None
+    _raw: memoryview | None
+    _manager: MnLScriptManager | None
 
     def __init__(
         self,
         header: FEventScriptHeader,
-        subroutines: list[Subroutine],
+        subroutines: collections.abc.MutableSequence[Subroutine],
         index: int | None = None,
     ) -> None:
         self.index = index
-        self.header = header
-        self.subroutines = subroutines
+        self._header = header
+        self._subroutines = subroutines
+        self._raw = None
+        self._manager = None
 
     @classmethod
     def from_bytes(
-        cls, manager: MnLScriptManager, data: bytes, index: int | None = None
+        cls,
+        manager: MnLScriptManager,
+        data: collections.abc.Buffer,
+        index: int | None = None,
+        lazy: bool = False,
     ) -> typing.Self:
-        data_io = io.BytesIO(data)
-        header = FEventScriptHeader.from_stream(manager, data_io, index)
+        if lazy:
+            script = cls.__new__(cls)
+            script.index = index
+            script._header = None
+            script._subroutines = None
+            script._raw = memoryview(data)
+            script._manager = manager
+            return script
+
+        data_view = memoryview(data)
+        header, subroutine_base_offset = FEventScriptHeader.from_buffer(
+            manager, data_view, 0, index
+        )
 
-        subroutine_base_offset = data_io.tell()
         subroutines: list[Subroutine] = []
         for i, offset in enumerate(header.subroutine_table):
             subroutines.append(
-                Subroutine.from_stream(
+                Subroutine.from_buffer(
                     manager,
-                    io.BytesIO(
-                        data[
-                            subroutine_base_offset
-                            + offset : (
-                                (
-                                    subroutine_base_offset
-                                    + header.subroutine_table[i + 1]
-                                )
-                                if i + 1 < len(header.subroutine_table)
-                                else None
-                            )
-                        ]
+                    data_view,
+                    subroutine_base_offset + offset,
+                    (
+                        (subroutine_base_offset + header.subroutine_table[i + 1])
+                        if i + 1 < len(header.subroutine_table)
+                        else None
                     ),
                 )
             )
 
         return cls(header, subroutines, index)
 
-    def to_bytes(self, manager: MnLScriptManager) -> bytes:
-        subroutines_raw = io.BytesIO()
+    @property
+    def header(self) -> FEventScriptHeader:
+        if self._header is None:
+            self._decode()
+        return typing.cast(FEventScriptHeader, self._header)
+
+    @header.setter
+    def header(self, value: FEventScriptHeader) -> None:
+        if self._header is None:
+            self._decode()
+        self._header = value
+
+    @property
+    def subroutines(self) -> collections.abc.MutableSequence[Subroutine]:
+        if self._subroutines is None:
+            self._decode()
+        return typing.cast(
+            collections.abc.MutableSequence[Subroutine], self._subroutines
+        )
+
+    @subroutines.setter
+    def subroutines(self, value: collections.abc.MutableSequence[Subroutine]) -> None:
+        if self._header is None:
+            self._decode()
+        self._subroutines = value
+
+    @property
+    def is_lazy(self) -> bool:
+        return self._raw is not None
+
+    def _decode(self) -> None:
+        manager = typing.cast("MnLScriptManager", self._manager)
+        raw = typing.cast(memoryview, self._raw)
+        header, subroutine_base_offset = FEventScriptHeader.from_buffer(
+            manager, raw, 0, self.index
+        )
+        subroutine_offsets = [
+            subroutine_base_offset + offset for offset in header.subroutine_table
+        ]
+
+        self._header = header
+        self._subroutines = LazySubroutineList(
+            manager,
+            [
+                raw[start:end]
+                for start, end in zip(
+                    subroutine_offsets, subroutine_offsets[1:] + [len(raw)]
+                )
+            ],
+        )
+
+    def get_raw_subroutines(self) -> list[Subroutine | memoryview]:
+        subroutines = self.subroutines
+        if isinstance(subroutines, LazySubroutineList):
+            return subroutines.get_raw_items()
+        return list(subroutines)
+
+    def size_of(self, manager: MnLScriptManager) -> int:
+        if self._header is None:
+            return len(typing.cast(memoryview, self._raw))
+
         self.header.subroutine_table = []
-        for subroutine in self.subroutines:
-            self.header.subroutine_table.append(subroutines_raw.tell())
-            subroutines_raw.write(subroutine.to_bytes(manager))
+        subroutines_size = 0
+        for subroutine in self.get_raw_subroutines():
+            self.header.subroutine_table.append(subroutines_size)
+            subroutines_size += (
+                len(subroutine)
+                if isinstance(subroutine, memoryview)
+                else subroutine.size_of(manager)
+            )
+
+        return self.header.size_of(manager) + subroutines_size
+
+    def write_into(
+        self, buffer: bytearray | memoryview, offset: int, manager: MnLScriptManager
+    ) -> int:
+        if self._header is None:
+            return write_bytes_into(buffer, offset, typing.cast(memoryview, self._raw))
+
+        subroutines = self.get_raw_subroutines()
+        self.header.subroutine_table = [0] * len(subroutines)
+        subroutine_base_offset = offset + self.header.size_of(manager)
+        position = subroutine_base_offset
+        for i, subroutine in enumerate(subroutines):
+            self.header.subroutine_table[i] = position - subroutine_base_offset
+            if isinstance(subroutine, memoryview):
+                position = write_bytes_into(buffer, position, subroutine)
+            else:
+                position = subroutine.write_into(buffer, position, manager)
+        self.header.write_into(buffer, offset, manager)
 
-        return self.header.to_bytes(manager) + subroutines_raw.getvalue()
+        return position
+
+    def to_bytes(self, manager: MnLScriptManager) -> bytes:
+        if self._header is None:
+            return bytes(typing.cast(memoryview, self._raw))
+
+        data = bytearray(self.size_of(manager))
+        self.write_into(memoryview(data), 0, manager)
+        return bytes(data)
+
+
+class CommandFormat:
+    command_id: int
+    metadata: CommandParameterMetadata
+    parameter_types: list[int]
+    param_variables_bitfield: int
+    has_return_value: bool
+    command_struct: struct.Struct
+    arguments_start: int
+    variable_indices: list[int]
+
+    def __init__(
+        self,
+        command_id: int,
+        metadata: CommandParameterMetadata,
+        param_variables_bitfield: int,
+        has_return_value: bool | None = None,
+    ) -> None:
+        if has_return_value is None:
+            has_return_value = metadata.has_return_value
+
+        self.command_id = command_id
+        self.metadata = metadata
+        self.parameter_types = metadata.parameter_types.copy()
+        self.param_variables_bitfield = param_variables_bitfield
+        self.has_return_value = has_return_value
+
+        struct_format = COMMAND_HEADER_STRUCT.format
+        if has_return_value:
+            struct_format += "H"
+        self.variable_indices = []
+        for i, param_type in enumerate(self.parameter_types):
+            if param_variables_bitfield & (1 << i):
+                struct_format += "H"
+                self.variable_indices.append(i)
+            else:
+                if param_type >= len(COMMAND_PARAMETER_STRUCT_MAP):
+                    raise InvalidCommandParameterTypeError(param_type)
+                struct_format += COMMAND_PARAMETER_STRUCT_MAP[param_type].format[1:]
+        self.command_struct = struct.Struct(struct_format)
+        self.arguments_start = 3 if has_return_value else 2
 
 
 class CommandParameterMetadata:
@@ -419,7 +822,11 @@ class CommandParameterMetadata:
 
     @classmethod
     def from_bytes(cls, data: bytes) -> typing.Self:
-        param_metadata, *raw_parameter_types = struct.unpack("<B15B", data)
+        return cls.from_values(COMMAND_PARAMETER_METADATA_STRUCT.unpack(data))
+
+    @classmethod
+    def from_values(cls, values: tuple[int, ...]) -> typing.Self:
+        param_metadata, *raw_parameter_types = values
         has_return_value = param_metadata & 0x80 != 0
         number_of_parameters = param_metadata & 0x7F
 
@@ -438,4 +845,6 @@ class CommandParameterMetadata:
         for i, parameter in enumerate(self.parameter_types):
             raw_parameter_types[i // 2] |= parameter << (i % 2 * 4)
 
-        return struct.pack("<B15B", param_metadata, *raw_parameter_types)
+        return COMMAND_PARAMETER_METADATA_STRUCT.pack(
+            param_metadata, *raw_parameter_types
+        )
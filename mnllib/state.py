@@ -0,0 +1,214 @@
+import gc
+import sys
+import struct
+import marshal
+import typing
+
+from .misc import FEventChunk
+from .script import Command, FEventScript, FEventScriptHeader, Subroutine, Variable
+from .text import LanguageTable, TextTable
+
+_FEVENT_STATE_MAGIC = b"MnLS"
+_FEVENT_STATE_VERSION = 2
+_FEVENT_STATE_HEADER_STRUCT = struct.Struct("<4sIIBB16s")
+
+
+FEventChunkState: typing.TypeAlias = tuple[typing.Any, ...] | None
+_TextTableState: typing.TypeAlias = tuple[
+    list[bytes], bool, list[tuple[int, int]] | None
+]
+
+
+def _encode_subroutine(subroutine: Subroutine) -> tuple[typing.Any, ...]:
+    return (
+        [
+            (
+                command.command_id,
+                sum(
+                    1 << i
+                    for i, argument in enumerate(command.arguments)
+                    if isinstance(argument, Variable)
+                ),
+                [
+                    argument.number if isinstance(argument, Variable) else argument
+                    for argument in command.arguments
+                ],
+                (
+                    command.result_variable.number
+                    if command.result_variable is not None
+                    else -1
+                ),
+            )
+            for command in subroutine.commands
+        ],
+        subroutine.footer,
+    )
+
+
+def _decode_subroutine(state: tuple[typing.Any, ...]) -> Subroutine:
+    command_states, footer = state
+    commands: list[Command] = []
+    for (
+        command_id,
+        param_variables_bitfield,
+        arguments,
+        result_variable,
+    ) in command_states:
+        if param_variables_bitfield != 0:
+            arguments = [
+                (
+                    Variable(argument)
+                    if param_variables_bitfield & (1 << i) != 0
+                    else argument
+                )
+                for i, argument in enumerate(arguments)
+            ]
+        commands.append(
+            Command(
+                command_id,
+                arguments,
+                Variable(result_variable) if result_variable >= 0 else None,
+            )
+        )
+    return Subroutine(commands, footer)
+
+
+def encode_fevent_chunk(chunk: FEventChunk | None) -> FEventChunkState:
+    if chunk is None:
+        return None
+    elif isinstance(chunk, FEventScript):
+        header = chunk.header
+        return (
+            "script",
+            chunk.index,
+            (
+                header.unk_0x00,
+                header.offsets_unk1,
+                header.array1,
+                header.var1,
+                header.array2,
+                header.var2,
+                header.array3,
+                header.section1_unk1,
+                header.array4,
+                header.array5,
+                header.subroutine_table,
+                _encode_subroutine(header.post_table_subroutine),
+            ),
+            [_encode_subroutine(subroutine) for subroutine in chunk.subroutines],
+        )
+    elif isinstance(chunk, LanguageTable):
+        return (
+            "language_table",
+            chunk.index,
+            [
+                (
+                    (text_table.entries, text_table.is_dialog, text_table.textbox_sizes)
+                    if isinstance(text_table, TextTable)
+                    else text_table
+                )
+                for text_table in chunk.text_tables
+            ],
+        )
+    else:
+        raise TypeError(f"cannot encode FEvent chunks of type {type(chunk).__name__}")
+
+
+def decode_fevent_chunk(state: FEventChunkState) -> FEventChunk | None:
+    if state is None:
+        return None
+    elif state[0] == "script":
+        _, index, header_state, subroutine_states = state
+        (
+            unk_0x00,
+            offsets_unk1,
+            array1,
+            var1,
+            array2,
+            var2,
+            array3,
+            section1_unk1,
+            array4,
+            array5,
+            subroutine_table,
+            post_table_subroutine,
+        ) = header_state
+        return FEventScript(
+            FEventScriptHeader(
+                index,
+                unk_0x00=unk_0x00,
+                offsets_unk1=offsets_unk1,
+                array1=array1,
+                var1=var1,
+                array2=array2,
+                var2=var2,
+                array3=array3,
+                section1_unk1=section1_unk1,
+                array4=array4,
+                array5=array5,
+                subroutine_table=subroutine_table,
+                post_table_subroutine=_decode_subroutine(post_table_subroutine),
+            ),
+            [
+                _decode_subroutine(subroutine_state)
+                for subroutine_state in subroutine_states
+            ],
+            index,
+        )
+    elif state[0] == "language_table":
+        _, index, text_table_states = state
+        return LanguageTable(
+            [
+                (
+                    TextTable(*typing.cast(_TextTableState, text_table_state))
+                    if isinstance(text_table_state, tuple)
+                    else text_table_state
+                )
+                for text_table_state in text_table_states
+            ],
+            index,
+        )
+    else:
+        raise ValueError(f"unknown FEvent chunk state type: {state[0]!r}")
+
+
+def decode_fevent_chunks(states: list[FEventChunkState]) -> list[FEventChunk | None]:
+    # Decoded chunks contain no reference cycles, and letting the collector run
+    # over all the new commands makes decoding about three times slower.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return [decode_fevent_chunk(state) for state in states]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def _pack_fevent_state_header(signature: bytes) -> bytes:
+    # The marshal format is only guaranteed to be stable for one Python version.
+    return _FEVENT_STATE_HEADER_STRUCT.pack(
+        _FEVENT_STATE_MAGIC,
+        _FEVENT_STATE_VERSION,
+        marshal.version,
+        sys.version_info.major,
+        sys.version_info.minor,
+        signature,
+    )
+
+
+def write_fevent_state(
+    file: typing.BinaryIO, signature: bytes, state: typing.Any
+) -> None:
+    file.write(_pack_fevent_state_header(signature))
+    marshal.dump(state, file)
+
+
+def read_fevent_state(file: typing.BinaryIO, signature: bytes) -> typing.Any | None:
+    if file.read(_FEVENT_STATE_HEADER_STRUCT.size) != _pack_fevent_state_header(
+        signature
+    ):
+        return None
+    try:
+        return marshal.load(file)
+    except (EOFError, ValueError, TypeError):
+        return None
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 import struct
-import io
+import collections.abc
 import typing
 
 from .managers import MnLScriptManager
 from .misc import FEventChunk
+from .utils import unpack_offset_table, write_bytes_into
 
 
 class TextTable:
@@ -24,12 +25,9 @@ class TextTable:
         self.textbox_sizes = textbox_sizes
 
     @classmethod
-    def from_bytes(cls, data: bytes, is_dialog: bool) -> typing.Self:
-        data_io = io.BytesIO(data)
-
-        entry_offsets: list[int] = []
-        while (data_io.tell() < entry_offsets[0]) if len(entry_offsets) > 0 else True:
-            entry_offsets.append(struct.unpack("<I", data_io.read(4))[0])
+    def from_bytes(cls, data: collections.abc.Buffer, is_dialog: bool) -> typing.Self:
+        data_view = memoryview(data)
+        entry_offsets = unpack_offset_table(data_view)
 
         entries: list[bytes] = []
         if is_dialog:
@@ -37,37 +35,45 @@ class TextTable:
         else:
             textbox_sizes = None
         for i, offset in enumerate(entry_offsets):
-            entry_data = data[
-                offset : entry_offsets[i + 1] if i + 1 < len(entry_offsets) else None
-            ]
+            entry_end = (
+                entry_offsets[i + 1] if i + 1 < len(entry_offsets) else len(data_view)
+            )
             if is_dialog:
                 typing.cast(list[tuple[int, int]], textbox_sizes).append(
-                    struct.unpack_from("<BB", entry_data)
+                    struct.unpack_from("<BB", data_view, offset)
                 )
-                entry_data = entry_data[2:]
-            entries.append(entry_data)
+                offset += 2
+            entries.append(bytes(data_view[offset:entry_end]))
 
         return cls(entries, is_dialog, textbox_sizes)
 
-    def to_bytes(self) -> bytes:
-        entry_offsets_raw = io.BytesIO()
-        entries_raw = io.BytesIO()
+    def size_of(self) -> int:
+        return len(self.entries) * (6 if self.is_dialog else 4) + sum(
+            len(entry) for entry in self.entries
+        )
 
-        base_entry_offset = len(self.entries) * 4
+    def write_into(self, buffer: bytearray | memoryview, offset: int) -> int:
+        buffer_view = memoryview(buffer)
+        entry_offsets: list[int] = []
+        position = offset + len(self.entries) * 4
         for i, entry in enumerate(self.entries):
-            entry_offsets_raw.write(
-                struct.pack("<I", base_entry_offset + entries_raw.tell())
-            )
+            entry_offsets.append(position - offset)
             if self.is_dialog:
-                entries_raw.write(
-                    struct.pack(
-                        "<BB",
-                        *typing.cast(list[tuple[int, int]], self.textbox_sizes)[i],
-                    )
+                buffer_view[position : position + 2] = bytes(
+                    typing.cast(list[tuple[int, int]], self.textbox_sizes)[i]
                 )
-            entries_raw.write(entry)
+                position += 2
+            end = position + len(entry)
+            buffer_view[position:end] = entry
+            position = end
+        struct.pack_into(f"<{len(entry_offsets)}I", buffer, offset, *entry_offsets)
 
-        return entry_offsets_raw.getvalue() + entries_raw.getvalue()
+        return position
+
+    def to_bytes(self) -> bytes:
+        data = bytearray(self.size_of())
+        self.write_into(memoryview(data), 0)
+        return bytes(data)
 
 
 class LanguageTable(FEventChunk):
@@ -82,17 +88,14 @@ class LanguageTable(FEventChunk):
 
     @classmethod
     def from_bytes(
-        cls, data: bytes, is_dialog: bool, index: int | None = None
+        cls, data: collections.abc.Buffer, is_dialog: bool, index: int | None = None
     ) -> typing.Self:
-        data_io = io.BytesIO(data)
-
-        language_table: list[int] = []
-        while (data_io.tell() < language_table[0]) if len(language_table) > 0 else True:
-            language_table.append(struct.unpack("<I", data_io.read(4))[0])
+        data_view = memoryview(data)
+        language_table = unpack_offset_table(data_view)
 
         text_tables: list[TextTable | bytes | None] = []
         for i, offset in enumerate(language_table):
-            text_table_data = data[
+            text_table_data = data_view[
                 offset : language_table[i + 1] if i + 1 < len(language_table) else None
             ]
             if len(text_table_data) <= 0:
@@ -102,21 +105,40 @@ class LanguageTable(FEventChunk):
             ):
                 text_tables.append(TextTable.from_bytes(text_table_data, is_dialog))
             else:
-                text_tables.append(text_table_data)
+                text_tables.append(bytes(text_table_data))
 
         return cls(text_tables, index)
 
-    def to_bytes(self, manager: MnLScriptManager | None = None) -> bytes:
-        text_table_offsets_raw = io.BytesIO()
-        text_tables_raw = io.BytesIO()
+    def size_of(self, manager: MnLScriptManager | None = None) -> int:
+        size = len(self.text_tables) * 4
+        for text_table in self.text_tables:
+            if isinstance(text_table, TextTable):
+                size += text_table.size_of()
+            elif isinstance(text_table, bytes):
+                size += len(text_table)
+        return size
 
-        base_text_table_offset = len(self.text_tables) * 4
+    def write_into(
+        self,
+        buffer: bytearray | memoryview,
+        offset: int,
+        manager: MnLScriptManager | None = None,
+    ) -> int:
+        text_table_offsets: list[int] = []
+        position = offset + len(self.text_tables) * 4
         for text_table in self.text_tables:
-            offset = base_text_table_offset + text_tables_raw.tell()
-            text_table_offsets_raw.write(struct.pack("<I", offset))
+            text_table_offsets.append(position - offset)
             if isinstance(text_table, TextTable):
-                text_tables_raw.write(text_table.to_bytes())
+                position = text_table.write_into(buffer, position)
             elif isinstance(text_table, bytes):
-                text_tables_raw.write(text_table)
+                position = write_bytes_into(buffer, position, text_table)
+        struct.pack_into(
+            f"<{len(text_table_offsets)}I", buffer, offset, *text_table_offsets
+        )
 
-        return text_table_offsets_raw.getvalue() + text_tables_raw.getvalue()
+        return position
+
+    def to_bytes(self, manager: MnLScriptManager | None = None) -> bytes:
+        data = bytearray(self.size_of(manager))
+        self.write_into(memoryview(data), 0, manager)
+        return bytes(data)
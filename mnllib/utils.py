@@ -1,6 +1,15 @@
+import os
+import mmap
+import asyncio
+import shutil
 import struct
+import contextlib
+import collections.abc
 import typing
 
+_P = typing.ParamSpec("_P")
+_T = typing.TypeVar("_T")
+
 
 def read_length_prefixed_array(
     stream: typing.BinaryIO,
@@ -21,3 +30,161 @@ def read_length_prefixed_array(
             element = element[0]
         elements.append(element)
     return elements
+
+
+def unpack_length_prefixed_array(
+    buffer: collections.abc.Buffer,
+    offset: int,
+    element_format: str | struct.Struct,
+    length_format: str | struct.Struct = struct.Struct("<I"),
+) -> tuple[list[typing.Any], int]:
+    if not isinstance(element_format, struct.Struct):
+        element_format = struct.Struct(element_format)
+    if not isinstance(length_format, struct.Struct):
+        length_format = struct.Struct(length_format)
+
+    (length,) = length_format.unpack_from(buffer, offset)
+    offset += length_format.size
+    end = offset + element_format.size * length
+    elements: list[typing.Any | tuple[typing.Any, ...]] = []
+    for element in element_format.iter_unpack(memoryview(buffer)[offset:end]):
+        if len(element) == 1:
+            element = element[0]
+        elements.append(element)
+    return elements, end
+
+
+def unpack_offset_table(buffer: collections.abc.Buffer) -> list[int]:
+    (first_offset,) = struct.unpack_from("<I", buffer)
+    return [first_offset] + list(
+        struct.unpack_from(f"<{max((first_offset - 1) // 4, 0)}I", buffer, 4)
+    )
+
+
+def write_bytes_into(
+    buffer: bytearray | memoryview, offset: int, data: bytes | bytearray | memoryview
+) -> int:
+    end = offset + len(data)
+    buffer[offset:end] = data
+    return end
+
+
+@contextlib.contextmanager
+def open_buffer(
+    file: typing.BinaryIO | str | collections.abc.Buffer,
+) -> collections.abc.Generator[memoryview, None, None]:
+    if isinstance(file, str):
+        with (
+            open(file, "rb") as stream,
+            mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as mapping,
+            memoryview(mapping) as view,
+        ):
+            yield view
+    elif isinstance(file, collections.abc.Buffer):
+        with memoryview(file) as view:
+            yield view
+    else:
+        file.seek(0)
+        with memoryview(file.read()) as view:
+            yield view
+
+
+def read_file_range(file: typing.BinaryIO | str, offset: int, size: int) -> bytes:
+    close_file = False
+    if isinstance(file, str):
+        file = open(file, "rb")
+        close_file = True
+
+    try:
+        file.seek(offset)
+        return file.read(size)
+    finally:
+        if close_file:
+            file.close()
+
+
+def _find_changed_range(old_data: bytes, new_data: bytes) -> tuple[int, int]:
+    old_view = memoryview(old_data)
+    new_view = memoryview(new_data)
+    low, high = 0, len(new_view)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old_view[:middle] == new_view[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    start = low
+    low, high = start, len(new_view)
+    while low < high:
+        middle = (low + high) // 2
+        if old_view[middle:] == new_view[middle:]:
+            high = middle
+        else:
+            low = middle + 1
+    return start, low
+
+
+def patch_file(
+    file: typing.BinaryIO | str,
+    offset: int,
+    size: int,
+    data: bytes,
+    atomic: bool = False,
+) -> None:
+    if atomic:
+        if not isinstance(file, str):
+            raise ValueError("atomic saves need a path, not a stream")
+        with open(file, "rb") as stream:
+            file_data = bytearray(stream.read())
+        file_data[offset : offset + size] = data
+        temp_path = f"{file}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "wb") as stream:
+                stream.write(file_data)
+                stream.flush()
+                os.fsync(stream.fileno())
+            shutil.copymode(file, temp_path)
+            os.replace(temp_path, file)
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temp_path)
+        return
+
+    close_file = False
+    if isinstance(file, str):
+        file = open(file, "r+b")
+        close_file = True
+
+    try:
+        if len(data) == size:
+            file.seek(offset)
+            old_data = file.read(size)
+            if len(old_data) == size:
+                start, end = _find_changed_range(old_data, data)
+                if start < end:
+                    file.seek(offset + start)
+                    file.write(data[start:end])
+                return
+
+        file.seek(0)
+        file_data = bytearray(file.read())
+        file_data[offset : offset + size] = data
+        file.seek(0)
+        file.truncate()
+        file.write(file_data)
+    finally:
+        if close_file:
+            file.close()
+
+
+async def to_thread_shielded(
+    function: typing.Callable[_P, _T], *args: _P.args, **kwargs: _P.kwargs
+) -> _T:
+    # Interrupting a save could leave files half-written, so cancellation only
+    # takes effect once the worker thread has finished.
+    task = asyncio.ensure_future(asyncio.to_thread(function, *args, **kwargs))
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        await asyncio.wait([task])
+        raise
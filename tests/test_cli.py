@@ -0,0 +1,107 @@
+import os
+import pathlib
+
+import pytest
+
+import mnllib
+import mnllib.cli
+
+
+def make_overlays(directory: pathlib.Path) -> dict[str, bytes]:
+    directory.mkdir()
+    overlays = {
+        f"overlay_{i:04}.bin": bytes(range(i, 256)) * (i + 1) + bytes(i * 100)
+        for i in range(3)
+    }
+    for name, data in overlays.items():
+        (directory / name).write_bytes(mnllib.compress(data))
+    return overlays
+
+
+def test_cli_round_trip(
+    tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    overlays = make_overlays(tmp_path / "overlay")
+    compressed = {name: (tmp_path / "overlay" / name).read_bytes() for name in overlays}
+
+    mnllib.cli.main(["decompress", "-j", "2", str(tmp_path / "overlay")])
+    for name, data in overlays.items():
+        decompressed_name = name.removesuffix(".bin") + ".dec.bin"
+        assert (tmp_path / "overlay.dec" / decompressed_name).read_bytes() == data
+    assert "3 processed, 0 up to date, 0 failed" in capsys.readouterr().out
+
+    mnllib.cli.main(
+        ["compress", "-o", str(tmp_path / "out"), str(tmp_path / "overlay.dec")]
+    )
+    for name, data in compressed.items():
+        assert (tmp_path / "out" / name).read_bytes() == data
+
+
+def test_cli_skips_up_to_date(
+    tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    make_overlays(tmp_path / "overlay")
+    pattern = str(tmp_path / "overlay" / "*.bin")
+    mnllib.cli.main(["decompress", "-j", "1", "-o", str(tmp_path / "out"), pattern])
+    capsys.readouterr()
+
+    input_path = tmp_path / "overlay" / "overlay_0001.bin"
+    output_stat = (tmp_path / "out" / "overlay_0001.dec.bin").stat()
+    os.utime(input_path, ns=(output_stat.st_atime_ns, output_stat.st_mtime_ns + 1))
+    mnllib.cli.main(["decompress", "-j", "1", "-o", str(tmp_path / "out"), pattern])
+    output = capsys.readouterr().out
+    assert "1 processed, 2 up to date, 0 failed" in output
+    assert str(input_path) in output
+
+    mnllib.cli.main(
+        ["decompress", "-j", "1", "-f", "-o", str(tmp_path / "out"), pattern]
+    )
+    assert "3 processed, 0 up to date" in capsys.readouterr().out
+
+
+def test_cli_failure(tmp_path: pathlib.Path) -> None:
+    (tmp_path / "broken.bin").write_bytes(b"\x80")
+    with pytest.raises(SystemExit) as exc_info:
+        mnllib.cli.main(["decompress", "-j", "1", str(tmp_path / "broken.bin")])
+    assert exc_info.value.code == 1
+
+
+@pytest.mark.parametrize("jobs", ["0", "-2", "two"])
+def test_cli_invalid_jobs(
+    tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str], jobs: str
+) -> None:
+    with pytest.raises(SystemExit) as exc_info:
+        mnllib.cli.main(["decompress", "-j", jobs, str(tmp_path)])
+    assert exc_info.value.code == 2
+    assert "argument -j/--jobs" in capsys.readouterr().err
+
+
+def test_cli_cache_and_level(
+    tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    overlays = make_overlays(tmp_path / "overlay")
+    mnllib.cli.main(["decompress", "-j", "1", str(tmp_path / "overlay")])
+    for _ in range(2):
+        mnllib.cli.main(
+            [
+                "compress",
+                "-j",
+                "2",
+                "-f",
+                "--cache",
+                str(tmp_path / "cache"),
+                "-o",
+                str(tmp_path / "out"),
+                str(tmp_path / "overlay.dec"),
+            ]
+        )
+    assert any((tmp_path / "cache").iterdir())
+    for name, data in overlays.items():
+        with (tmp_path / "out" / name).open("rb") as file:
+            assert mnllib.decompress(file) == data
+    capsys.readouterr()
+
+    with pytest.raises(SystemExit) as exc_info:
+        mnllib.cli.main(["compress", "-l", "7", str(tmp_path / "overlay.dec")])
+    assert exc_info.value.code == 2
+    assert "invalid choice" in capsys.readouterr().err
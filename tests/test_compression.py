@@ -0,0 +1,147 @@
+import io
+import random
+import pathlib
+
+import pytest
+
+import mnllib
+
+
+def make_test_data() -> list[bytes]:
+    rng = random.Random(0x4D4E4C)
+    return [
+        b"x",
+        b"abcabcabcabcaaaaaaaab",
+        bytes(5000),
+        rng.randbytes(3000),
+        bytes(rng.choice(b"ab") for _ in range(4000)),
+        b"".join(
+            rng.choice([b"\x01\x00\x00\x00", b"\x12\x34", b"text\x00", bytes(20)])
+            for _ in range(2000)
+        ),
+    ]
+
+
+@pytest.mark.parametrize("data", make_test_data(), ids=lambda data: str(len(data)))
+@pytest.mark.parametrize("max_chain_length", [None, 1, 16])
+def test_compress_round_trip(data: bytes, max_chain_length: int | None) -> None:
+    compressed = mnllib.compress(data, max_chain_length=max_chain_length)
+    assert mnllib.decompress(io.BytesIO(compressed)) == data
+
+
+@pytest.mark.parametrize("data", make_test_data(), ids=lambda data: str(len(data)))
+@pytest.mark.parametrize(
+    "level", [mnllib.COMPRESSION_LEVEL_FAST, mnllib.COMPRESSION_LEVEL_MAX]
+)
+def test_compress_level_round_trip(data: bytes, level: int) -> None:
+    compressed = mnllib.compress(data, level)
+    assert mnllib.decompress(io.BytesIO(compressed)) == data
+
+
+@pytest.mark.parametrize("data", make_test_data(), ids=lambda data: str(len(data)))
+def test_compress_max_level_size(data: bytes) -> None:
+    assert len(mnllib.compress(data, mnllib.COMPRESSION_LEVEL_MAX)) <= len(
+        mnllib.compress(data)
+    )
+
+
+def test_compress_greedy_output() -> None:
+    assert mnllib.compress(b"abcabcabcabcaaaaaaaab") == bytes.fromhex(
+        "15000c009561626303011e0604066162"
+    )
+
+
+def test_decompress_overlapping_reference() -> None:
+    stream = io.BytesIO(bytes.fromhex("0800050025616202040000"))
+    assert mnllib.decompress(stream) == b"abababab"
+    assert stream.tell() == 9
+
+
+def test_decompress_truncated() -> None:
+    with pytest.raises(ValueError, match="truncated"):
+        mnllib.decompress(io.BytesIO(bytes.fromhex("0800050025616202")))
+
+
+@pytest.mark.parametrize("cache_size", [9, 64])
+def test_compressed_file(cache_size: int) -> None:
+    data = b"".join(make_test_data())
+    compressed = io.BytesIO(mnllib.compress(data))
+    with mnllib.CompressedFile(compressed, cache_size) as file:
+        assert file.uncompressed_size == len(data)
+        for offset, size in [(len(data) - 700, 300), (5, 1), (4000, 2000), (0, 512)]:
+            assert file.seek(offset) == offset
+            assert file.read(size) == data[offset : offset + size]
+            assert file.tell() == offset + size
+        file.seek(-10, io.SEEK_END)
+        assert file.read() == data[-10:]
+        assert file.read(1) == b""
+        file.seek(0)
+        assert file.read() == data
+
+
+def test_iter_decompress() -> None:
+    data = b"".join(make_test_data())
+    blocks = list(mnllib.iter_decompress(io.BytesIO(mnllib.compress(data))))
+    assert all(len(block) == 512 for block in blocks[:-1])
+    assert b"".join(blocks) == data
+
+    out = io.BytesIO()
+    assert mnllib.decompress_to(io.BytesIO(mnllib.compress(data)), out) == len(data)
+    assert out.getvalue() == data
+
+
+@pytest.mark.parametrize("chunk_size", [1000, 512, 7])
+@pytest.mark.parametrize(
+    "level", [mnllib.COMPRESSION_LEVEL_DEFAULT, mnllib.COMPRESSION_LEVEL_MAX]
+)
+def test_compressor(chunk_size: int, level: int) -> None:
+    data = make_test_data()[-1][:8000]
+    compressor = mnllib.Compressor(len(data), level)
+    compressed = b"".join(
+        compressor.compress(data[i : i + chunk_size])
+        for i in range(0, len(data), chunk_size)
+    )
+    compressed += compressor.flush()
+    assert compressed == mnllib.compress(data, level)
+
+    with pytest.raises(ValueError, match="flushed"):
+        compressor.compress(b"")
+
+
+def test_compressor_size_mismatch() -> None:
+    compressor = mnllib.Compressor(10)
+    with pytest.raises(ValueError, match="more data"):
+        compressor.compress(bytes(11))
+    compressor.compress(bytes(5))
+    with pytest.raises(ValueError, match="less data"):
+        compressor.flush()
+
+
+def test_compress_parallel() -> None:
+    data = b"".join(make_test_data()) * 2
+    assert mnllib.compress(data, workers=2) == mnllib.compress(data)
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_compress_cache(on_disk: bool, tmp_path: pathlib.Path) -> None:
+    cache = mnllib.CompressionCache(directory=tmp_path if on_disk else None)
+    data = bytearray(b"".join(make_test_data()))
+    assert mnllib.compress(bytes(data), cache=cache) == mnllib.compress(bytes(data))
+    num_blocks = cache.misses
+    assert cache.hits == 0
+
+    data[10000] ^= 0xFF
+    assert mnllib.compress(bytes(data), cache=cache) == mnllib.compress(bytes(data))
+    assert cache.hits + cache.misses == num_blocks * 2
+    assert cache.misses - num_blocks <= 9
+
+    if on_disk:
+        cache = mnllib.CompressionCache(directory=tmp_path)
+        mnllib.compress(bytes(data), cache=cache)
+        assert cache.misses == 0
+
+
+def test_compress_cache_eviction() -> None:
+    cache = mnllib.CompressionCache(max_size=2000)
+    mnllib.compress(b"".join(make_test_data()), cache=cache)
+    assert 0 < cache.size <= 2000
@@ -0,0 +1,148 @@
+import asyncio
+import pathlib
+import typing
+
+import pytest
+
+import mnllib
+
+from .test_script import make_fevent, make_manager, make_overlays
+
+
+def make_project(data_directory: pathlib.Path) -> mnllib.FEventScriptManager:
+    manager = make_manager()
+    fevent = make_fevent(manager)
+    overlay3, overlay6 = make_overlays(manager)
+
+    (data_directory / "overlay.dec").mkdir(parents=True)
+    (data_directory / "data" / "FEvent").mkdir(parents=True)
+    (data_directory / "data" / "FEvent" / "FEvent.dat").write_bytes(fevent)
+    (data_directory / "overlay.dec" / "overlay_0003.dec.bin").write_bytes(
+        overlay3.getvalue()
+    )
+    (data_directory / "overlay.dec" / "overlay_0006.dec.bin").write_bytes(
+        overlay6.getvalue()
+    )
+    for number, address, number_of_commands in [
+        (
+            12,
+            mnllib.BATTLE_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS,
+            mnllib.BATTLE_NUMBER_OF_COMMANDS,
+        ),
+        (
+            123,
+            mnllib.MENU_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS,
+            mnllib.MENU_NUMBER_OF_COMMANDS,
+        ),
+        (
+            124,
+            mnllib.SHOP_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS,
+            mnllib.SHOP_NUMBER_OF_COMMANDS,
+        ),
+    ]:
+        (data_directory / "overlay.dec" / f"overlay_{number:04}.dec.bin").write_bytes(
+            bytes(address + number_of_commands * 16)
+        )
+    return manager
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_script_project(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch, workers: int
+) -> None:
+    manager = make_project(tmp_path / "data")
+
+    project = mnllib.ScriptProject(tmp_path / "data", workers=workers)
+    assert project.fevent_manager.fevent_offset_table == manager.fevent_offset_table
+    assert project.fevent_manager.fevent_footer == b"footer"
+    assert len(project.battle_manager.command_parameter_metadata_table) == (
+        mnllib.BATTLE_NUMBER_OF_COMMANDS
+    )
+    assert len(project.shop_manager.command_parameter_metadata_table) == (
+        mnllib.SHOP_NUMBER_OF_COMMANDS
+    )
+
+    saved_overlays: list[int] = []
+
+    def record_save(
+        save: typing.Callable[..., None], number: int
+    ) -> typing.Callable[..., None]:
+        def wrapper(*args: typing.Any) -> None:
+            saved_overlays.append(number)
+            save(*args)
+
+        return wrapper
+
+    for manager_class, number in [
+        (mnllib.FEventScriptManager, 3),
+        (mnllib.FEventScriptManager, 6),
+        (mnllib.BattleScriptManager, 12),
+        (mnllib.MenuScriptManager, 123),
+        (mnllib.ShopScriptManager, 124),
+    ]:
+        monkeypatch.setattr(
+            manager_class,
+            f"save_overlay{number}",
+            record_save(getattr(manager_class, f"save_overlay{number}"), number),
+        )
+
+    project.save_all()
+    assert saved_overlays == []
+    project.battle_manager.command_parameter_metadata_table[5] = (
+        mnllib.CommandParameterMetadata(True, [0x2])
+    )
+    project.fevent_manager.fevent_chunks.append((None, None, None))
+    project.save_all(atomic=True, workers=workers)
+    assert sorted(saved_overlays) == [3, 12]
+    project.save_all()
+    assert sorted(saved_overlays) == [3, 12]
+
+    loaded_project = mnllib.ScriptProject(tmp_path / "data", workers=1)
+    assert loaded_project.battle_manager.command_parameter_metadata_table[
+        5
+    ].to_bytes() == (mnllib.CommandParameterMetadata(True, [0x2]).to_bytes())
+    assert len(loaded_project.fevent_manager.fevent_offset_table) == 3
+    assert loaded_project.fevent_manager.fevent_footer == b"footer"
+
+
+def test_async_script_project(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    make_project(tmp_path / "data")
+    make_project(tmp_path / "other")
+    monkeypatch.chdir(tmp_path)
+
+    async def main() -> None:
+        projects = [
+            mnllib.ScriptProject(tmp_path / name, load=False)
+            for name in ["data", "other"]
+        ]
+        await asyncio.gather(*[project.aload_all(workers=2) for project in projects])
+        for project in projects:
+            assert len(project.fevent_manager.fevent_offset_table) == 2
+            assert len(project.menu_manager.command_parameter_metadata_table) == (
+                mnllib.MENU_NUMBER_OF_COMMANDS
+            )
+
+        manager = mnllib.ShopScriptManager(load=False)
+        task = asyncio.ensure_future(manager.aload_all())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert manager.command_parameter_metadata_table == []
+
+        projects[0].shop_manager.command_parameter_metadata_table[3] = (
+            mnllib.CommandParameterMetadata(True, [0x1])
+        )
+        task = asyncio.ensure_future(projects[0].asave_all())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await manager.aload_all()
+        assert manager.command_parameter_metadata_table[3].to_bytes() == (
+            mnllib.CommandParameterMetadata(True, [0x1]).to_bytes()
+        )
+
+    asyncio.run(main())
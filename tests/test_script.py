@@ -0,0 +1,697 @@
+import io
+import mmap
+import pathlib
+import multiprocessing
+import typing
+
+import pytest
+
+import mnllib
+
+
+def make_manager() -> mnllib.FEventScriptManager:
+    manager = mnllib.FEventScriptManager(load=False)
+    manager.command_parameter_metadata_table = [
+        mnllib.CommandParameterMetadata(False, []),
+        mnllib.CommandParameterMetadata(True, [0x1, 0x5]),
+        mnllib.CommandParameterMetadata(False, [0x0, 0x2, 0x3, 0x4, 0x6, 0x7]),
+    ]
+    return manager
+
+
+@pytest.fixture
+def manager() -> mnllib.FEventScriptManager:
+    return make_manager()
+
+
+def make_commands() -> list[mnllib.Command]:
+    return [
+        mnllib.Command(0x0000, []),
+        mnllib.Command(0x0001, [0xBEEF, -2], mnllib.Variable(0x1000)),
+        mnllib.Command(0x0001, [mnllib.Variable(0x1001), 5], mnllib.Variable(0x1002)),
+        mnllib.Command(0x0002, [0xFF, 0xDEADBEEF, -1, mnllib.Variable(0x1003), 7, -8]),
+    ]
+
+
+def assert_commands_equal(
+    command: mnllib.Command, expected_command: mnllib.Command
+) -> None:
+    assert command.command_id == expected_command.command_id
+    assert [
+        argument.number if isinstance(argument, mnllib.Variable) else argument
+        for argument in command.arguments
+    ] == [
+        argument.number if isinstance(argument, mnllib.Variable) else argument
+        for argument in expected_command.arguments
+    ]
+    assert [type(argument) for argument in command.arguments] == [
+        type(argument) for argument in expected_command.arguments
+    ]
+    if expected_command.result_variable is None:
+        assert command.result_variable is None
+    else:
+        assert command.result_variable is not None
+        assert command.result_variable.number == expected_command.result_variable.number
+
+
+def test_command_round_trip(manager: mnllib.FEventScriptManager) -> None:
+    for command in make_commands():
+        data = command.to_bytes(manager)
+        assert_commands_equal(
+            mnllib.Command.from_stream(manager, io.BytesIO(data)), command
+        )
+        parsed_command, size = mnllib.Command.from_buffer(
+            manager, memoryview(b"\x00" + data), 1
+        )
+        assert_commands_equal(parsed_command, command)
+        assert size == len(data)
+
+
+def test_subroutine_footer(manager: mnllib.FEventScriptManager) -> None:
+    commands = make_commands()
+    footer = b"\x03\x00\x00\x00"
+    subroutine = mnllib.Subroutine.from_stream(
+        manager,
+        io.BytesIO(mnllib.Subroutine(commands, footer).to_bytes(manager)),
+    )
+    assert len(subroutine.commands) == len(commands)
+    for command, expected_command in zip(subroutine.commands, commands):
+        assert_commands_equal(command, expected_command)
+    assert subroutine.footer == footer
+
+
+@pytest.mark.parametrize(
+    "footer",
+    [b"", b"\x01", b"\x03\x00\x00\x00\x00\x00", b"\x01\x00\x00\x00\x00\x00\x00"],
+)
+def test_subroutine_command_offsets(
+    manager: mnllib.FEventScriptManager, footer: bytes
+) -> None:
+    data = b"\xaa" + mnllib.Subroutine(make_commands(), footer).to_bytes(manager)
+    assert mnllib.Subroutine.command_offsets(manager, data, 1) == (
+        [1, 7, 21, 35],
+        len(data) - len(footer),
+    )
+    assert mnllib.Subroutine.count_commands(manager, data, 1) == 4
+    assert mnllib.Subroutine.count_commands(manager, data, 1, 34) == 2
+    assert mnllib.Subroutine.from_buffer(manager, data, 1).footer == footer
+
+
+def test_command_format_cache(manager: mnllib.FEventScriptManager) -> None:
+    command_format = manager.get_command_format(0x0001, 0b01)
+    assert manager.get_command_format(0x0001, 0b01) is command_format
+    assert manager.get_command_format(0x0001, 0xFF01) is command_format
+    assert command_format.command_struct.format == "<HIHHi"
+
+    manager.command_parameter_metadata_table[1].parameter_types.append(0x2)
+    command_format = manager.get_command_format(0x0001, 0b01)
+    assert command_format.command_struct.format == "<HIHHiI"
+
+    manager.command_parameter_metadata_table[1] = mnllib.CommandParameterMetadata(
+        False, []
+    )
+    assert manager.get_command_format(0x0001, 0b01).command_struct.format == "<HI"
+
+
+def make_fevent_script() -> mnllib.FEventScript:
+    return mnllib.FEventScript(
+        mnllib.FEventScriptHeader(
+            unk_0x00=bytes(range(12)),
+            offsets_unk1=b"\x01\x02",
+            array1=[1, 2],
+            var1=3,
+            array2=[],
+            var2=4,
+            array3=[5, 6, 7],
+            section1_unk1=b"\x08",
+            array4=[(9, 10, 11, 12, 13)],
+            array5=[14],
+            post_table_subroutine=mnllib.Subroutine(make_commands()[:1]),
+        ),
+        [
+            mnllib.Subroutine(make_commands()),
+            mnllib.Subroutine(make_commands()[1:], b"\x01\x02\x03"),
+        ],
+    )
+
+
+def test_fevent_script_round_trip(manager: mnllib.FEventScriptManager) -> None:
+    data = make_fevent_script().to_bytes(manager)
+    script = mnllib.FEventScript.from_bytes(manager, data)
+    assert script.size_of(manager) == len(data)
+    assert script.header.size_of(manager) == len(script.header.to_bytes(manager))
+    assert script.header.subroutine_table == [0, 54]
+    assert script.to_bytes(manager) == data
+
+
+def test_save_fevent(manager: mnllib.FEventScriptManager) -> None:
+    language_table = mnllib.LanguageTable(
+        [
+            mnllib.TextTable([b"a\xff", b"bc\xff"], True, [(1, 2), (3, 4)]),
+            b"\x00\x01",
+            None,
+        ]
+    )
+    manager.fevent_chunks = [
+        (make_fevent_script(), None, language_table),
+        (make_fevent_script(), language_table, None),
+    ]
+    manager.fevent_footer = b"footer"
+    file = io.BytesIO()
+    file.write(b"\x00" * 3)
+    manager.save_fevent(file)
+    data = file.getvalue()
+
+    script_size = len(make_fevent_script().to_bytes(manager))
+    language_table_raw = language_table.to_bytes()
+    assert language_table.size_of() == len(language_table_raw)
+    assert manager.fevent_offset_table == [
+        (3, 3 + script_size, 3 + script_size),
+        (
+            3 + script_size + len(language_table_raw),
+            3 + script_size * 2 + len(language_table_raw),
+            3 + script_size * 2 + len(language_table_raw) * 2,
+        ),
+    ]
+    assert manager.fevent_footer_offset == len(data) - len(b"footer")
+    assert data == (
+        b"\x00" * 3
+        + (make_fevent_script().to_bytes(manager) + language_table_raw) * 2
+        + b"footer"
+    )
+
+
+def make_dialog_language_table() -> mnllib.LanguageTable:
+    return mnllib.LanguageTable(
+        [
+            (
+                mnllib.TextTable([b"a\xff", b"bc\xff"], True, [(1, 2), (3, 4)])
+                if i >= 0x44 and i <= 0x48
+                else bytes([i])
+            )
+            for i in range(0x128 // 4)
+        ]
+    )
+
+
+def copy_fevent_layout(
+    manager: mnllib.FEventScriptManager,
+) -> mnllib.FEventScriptManager:
+    new_manager = mnllib.FEventScriptManager(load=False)
+    new_manager.command_parameter_metadata_table = (
+        manager.command_parameter_metadata_table
+    )
+    new_manager.fevent_offset_table = manager.fevent_offset_table
+    new_manager.fevent_footer_offset = manager.fevent_footer_offset
+    return new_manager
+
+
+def make_fevent(
+    manager: mnllib.FEventScriptManager, number_of_language_tables: int = 1
+) -> bytes:
+    fevent_chunks: list[
+        tuple[
+            mnllib.FEventScript | None,
+            mnllib.FEventChunk | None,
+            mnllib.FEventChunk | None,
+        ]
+    ] = [
+        (make_fevent_script(), None, make_dialog_language_table())
+        for _ in range(number_of_language_tables)
+    ]
+    fevent_chunks.append((make_fevent_script(), None, None))
+    manager.fevent_chunks = fevent_chunks
+    manager.fevent_footer = b"footer"
+    file = io.BytesIO()
+    manager.save_fevent(file)
+    return file.getvalue()
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_load_fevent_round_trip(
+    manager: mnllib.FEventScriptManager, lazy: bool
+) -> None:
+    data = make_fevent(manager)
+
+    loaded_manager = copy_fevent_layout(manager)
+    loaded_manager.load_fevent(io.BytesIO(data), lazy)
+    assert loaded_manager.fevent_footer == b"footer"
+    assert [
+        [type(chunk) for chunk in triple] for triple in loaded_manager.fevent_chunks
+    ] == [
+        [mnllib.FEventScript, type(None), mnllib.LanguageTable],
+        [mnllib.FEventScript, type(None), type(None)],
+    ]
+
+    saved_file = io.BytesIO()
+    loaded_manager.save_fevent(saved_file)
+    assert saved_file.getvalue() == data
+
+
+def test_lazy_fevent_script(manager: mnllib.FEventScriptManager) -> None:
+    data = make_fevent_script().to_bytes(manager)
+    script = mnllib.FEventScript.from_bytes(manager, data, lazy=True)
+    assert script.size_of(manager) == len(data)
+    assert script.to_bytes(manager) == data
+
+    subroutines = script.subroutines
+    assert isinstance(subroutines, mnllib.LazySubroutineList)
+    assert len(subroutines) == 2
+    assert not subroutines.is_decoded(0)
+    assert script.to_bytes(manager) == data
+
+    subroutines[1].commands.append(mnllib.Command(0x0000, []))
+    assert not subroutines.is_decoded(0)
+    assert subroutines.is_decoded(1)
+    expected_script = make_fevent_script()
+    expected_script.subroutines[1].commands.append(mnllib.Command(0x0000, []))
+    assert script.to_bytes(manager) == expected_script.to_bytes(manager)
+
+    subroutines.insert(0, mnllib.Subroutine([], b"\x01\x02"))
+    expected_script.subroutines.insert(0, mnllib.Subroutine([], b"\x01\x02"))
+    assert script.to_bytes(manager) == expected_script.to_bytes(manager)
+    assert script.header.subroutine_table == [0, 2, 56]
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_fevent_random_access(
+    manager: mnllib.FEventScriptManager, lazy: bool, tmp_path: pathlib.Path
+) -> None:
+    path = str(tmp_path / "FEvent.dat")
+    pathlib.Path(path).write_bytes(make_fevent(manager, 3))
+
+    opened_manager = copy_fevent_layout(manager)
+    opened_manager.open_fevent(path, max_cache_entries=2, lazy=lazy)
+    assert opened_manager.fevent_footer == b"footer"
+    script, empty_chunk, language_table = opened_manager.get_triple(1)
+    assert isinstance(script, mnllib.FEventScript)
+    assert empty_chunk is None
+    assert isinstance(language_table, mnllib.LanguageTable)
+    assert opened_manager.get_chunk(3) is script
+    cache = typing.cast(mnllib.FEventChunkCache, opened_manager.fevent_chunk_cache)
+    assert len(cache) == 2
+
+    script.subroutines[0].commands.pop()
+    typing.cast(mnllib.FEventScript, opened_manager.get_chunk(0)).subroutines.pop()
+    del script
+    held_language_table = opened_manager.get_chunk(2)
+    assert isinstance(held_language_table, mnllib.LanguageTable)
+    for index in range(6, 12):
+        opened_manager.get_chunk(index)
+    assert 0 in cache
+    assert 3 in cache
+    assert 2 not in cache
+    held_language_table.text_tables[0] = b"\xff"
+    opened_manager.save_fevent(path)
+
+    scripts = [
+        typing.cast(mnllib.FEventScript, triple[0]) for triple in manager.fevent_chunks
+    ]
+    scripts[0].subroutines.pop()
+    scripts[1].subroutines[0].commands.pop()
+    expected_language_table = manager.fevent_chunks[0][2]
+    assert isinstance(expected_language_table, mnllib.LanguageTable)
+    expected_language_table.text_tables[0] = b"\xff"
+    expected_file = io.BytesIO()
+    manager.save_fevent(expected_file)
+    with open(path, "rb") as file:
+        assert file.read() == expected_file.getvalue()
+    assert opened_manager.fevent_offset_table == manager.fevent_offset_table
+    opened_manager.fevent_chunk_cache = mnllib.FEventChunkCache()
+    assert typing.cast(mnllib.FEventScript, opened_manager.get_chunk(3)).to_bytes(
+        manager
+    ) == scripts[1].to_bytes(manager)
+
+
+@pytest.mark.parametrize(
+    ("max_cache_size", "max_cache_entries"), [(300, None), (16 * 1024 * 1024, 1)]
+)
+def test_fevent_edit_after_eviction(
+    manager: mnllib.FEventScriptManager,
+    max_cache_size: int,
+    max_cache_entries: int | None,
+    tmp_path: pathlib.Path,
+) -> None:
+    path = str(tmp_path / "FEvent.dat")
+    pathlib.Path(path).write_bytes(make_fevent(manager, 3))
+
+    opened_manager = copy_fevent_layout(manager)
+    opened_manager.open_fevent(path, max_cache_size, max_cache_entries)
+    first_script = opened_manager.get_chunk(0)
+    second_script = opened_manager.get_chunk(3)
+    assert isinstance(first_script, mnllib.FEventScript)
+    assert isinstance(second_script, mnllib.FEventScript)
+    assert 0 not in typing.cast(
+        mnllib.FEventChunkCache, opened_manager.fevent_chunk_cache
+    )
+    first_script.header.var1 = 7
+    second_script.header.var1 = 8
+    del first_script, second_script
+    opened_manager.get_chunk(6)
+    opened_manager.save_fevent(path)
+
+    for index, var1 in [(0, 7), (1, 8)]:
+        typing.cast(
+            mnllib.FEventScript, manager.fevent_chunks[index][0]
+        ).header.var1 = var1
+    expected_file = io.BytesIO()
+    manager.save_fevent(expected_file)
+    with open(path, "rb") as file:
+        assert file.read() == expected_file.getvalue()
+
+
+class RecordingBytesIO(io.BytesIO):
+    write_sizes: list[int]
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.write_sizes = []
+
+    def write(self, data: typing.Any) -> int:
+        self.write_sizes.append(len(memoryview(data)))
+        return super().write(data)
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_incremental_save_fevent(
+    manager: mnllib.FEventScriptManager, cached: bool, tmp_path: pathlib.Path
+) -> None:
+    file = RecordingBytesIO()
+    file.write(make_fevent(manager))
+
+    loaded_manager = copy_fevent_layout(manager)
+    if cached:
+        loaded_manager.open_fevent(file)
+    else:
+        loaded_manager.load_fevent(file)
+    file.write_sizes.clear()
+    loaded_manager.save_fevent(file)
+    assert file.write_sizes == []
+
+    script = typing.cast(mnllib.FEventScript, loaded_manager.get_chunk(0))
+    script.subroutines[0].commands[1].arguments[0] = 0x1234
+    loaded_manager.save_fevent(file, detect_changes=False)
+    assert file.write_sizes == []
+    loaded_manager.mark_dirty(0)
+    loaded_manager.save_fevent(file, detect_changes=False)
+    assert file.write_sizes == [script.size_of(manager)]
+
+    expected_script = typing.cast(mnllib.FEventScript, manager.fevent_chunks[0][0])
+    expected_script.subroutines[0].commands[1].arguments[0] = 0x1234
+    expected_file = io.BytesIO()
+    manager.save_fevent(expected_file)
+    assert file.getvalue() == expected_file.getvalue()
+
+    script.subroutines[0].commands.pop()
+    file = RecordingBytesIO()
+    loaded_manager.save_fevent(file)
+    assert len(file.write_sizes) == 1
+
+    expected_script.subroutines[0].commands.pop()
+    expected_file = io.BytesIO()
+    manager.save_fevent(expected_file)
+    assert file.getvalue() == expected_file.getvalue()
+    assert loaded_manager.fevent_offset_table == manager.fevent_offset_table
+
+    file.write_sizes.clear()
+    loaded_manager.mark_dirty(0)
+    loaded_manager.save_fevent(file, detect_changes=False)
+    assert file.write_sizes == [script.size_of(manager)]
+    assert file.getvalue() == expected_file.getvalue()
+
+    path = str(tmp_path / "FEvent.dat")
+    loaded_manager.save_fevent(path)
+    reloaded_manager = copy_fevent_layout(loaded_manager)
+    if cached:
+        reloaded_manager.open_fevent(path)
+    else:
+        reloaded_manager.load_fevent(path)
+    script = typing.cast(mnllib.FEventScript, reloaded_manager.get_chunk(0))
+    script.subroutines[0].commands[1].arguments[1] = 7
+    reloaded_manager.save_fevent(path)
+    expected_script.subroutines[0].commands[1].arguments[1] = 7
+    expected_file = io.BytesIO()
+    manager.save_fevent(expected_file)
+    with open(path, "rb") as saved_file:
+        assert saved_file.read() == expected_file.getvalue()
+
+
+def test_load_fevent_workers(manager: mnllib.FEventScriptManager) -> None:
+    data = make_fevent(manager, 4)
+
+    loaded_manager = copy_fevent_layout(manager)
+    loaded_manager.load_fevent(io.BytesIO(data), workers=2)
+    assert [
+        [type(chunk) for chunk in triple] for triple in loaded_manager.fevent_chunks
+    ] == [[type(chunk) for chunk in triple] for triple in manager.fevent_chunks]
+    saved_file = io.BytesIO()
+    loaded_manager.save_fevent(saved_file)
+    assert saved_file.getvalue() == data
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+@pytest.mark.parametrize("fork", [False, True])
+def test_save_fevent_workers(
+    manager: mnllib.FEventScriptManager,
+    lazy: bool,
+    fork: bool,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    if not fork:
+        monkeypatch.setattr(
+            mnllib.managers.multiprocessing, "get_all_start_methods", lambda: ["spawn"]
+        )
+    elif "fork" not in multiprocessing.get_all_start_methods():
+        pytest.skip("fork is not available")
+    data = make_fevent(manager, 4)
+    parallel_file = io.BytesIO()
+    manager.save_fevent(parallel_file, workers=2)
+    assert parallel_file.getvalue() == data
+
+    saved_files: list[bytes] = []
+    for workers in [None, 2]:
+        loaded_manager = copy_fevent_layout(manager)
+        loaded_manager.load_fevent(io.BytesIO(data), lazy)
+        typing.cast(mnllib.FEventScript, loaded_manager.get_chunk(3)).subroutines[
+            1
+        ].commands.pop()
+        loaded_manager.fevent_chunks[2] = (make_fevent_script(), None, None)
+        saved_file = io.BytesIO()
+        loaded_manager.save_fevent(saved_file, workers=workers)
+        saved_files.append(saved_file.getvalue())
+    assert saved_files[0] == saved_files[1]
+    assert saved_files[0] != data
+
+
+def make_overlays(
+    manager: mnllib.FEventScriptManager,
+) -> tuple[io.BytesIO, io.BytesIO]:
+    manager.command_parameter_metadata_table += [
+        mnllib.CommandParameterMetadata(False, [])
+    ] * (
+        mnllib.FEVENT_NUMBER_OF_COMMANDS - len(manager.command_parameter_metadata_table)
+    )
+    overlay3 = io.BytesIO(bytes(mnllib.FEVENT_OFFSET_TABLE_ADDRESS))
+    manager.save_overlay3(overlay3)
+    overlay6 = io.BytesIO(
+        bytes(
+            mnllib.FEVENT_COMMAND_PARAMETER_METADATA_TABLE_ADDRESS
+            + mnllib.FEVENT_NUMBER_OF_COMMANDS * 16
+        )
+    )
+    manager.save_overlay6(overlay6)
+    return overlay3, overlay6
+
+
+def test_fevent_state_cache(
+    manager: mnllib.FEventScriptManager,
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    data = make_fevent(manager)
+    pathlib.Path("data/data/FEvent").mkdir(parents=True)
+    pathlib.Path("data/data/FEvent/FEvent.dat").write_bytes(data)
+    overlay3, overlay6 = make_overlays(manager)
+    pathlib.Path("data/overlay.dec").mkdir()
+    pathlib.Path("data/overlay.dec/overlay_0003.dec.bin").write_bytes(
+        overlay3.getvalue()
+    )
+    pathlib.Path("data/overlay.dec/overlay_0006.dec.bin").write_bytes(
+        overlay6.getvalue()
+    )
+
+    mnllib.FEventScriptManager(cache_directory="cache")
+    assert len(list(pathlib.Path("cache").iterdir())) == 1
+
+    def fail_parsing(*args: typing.Any, **kwargs: typing.Any) -> None:
+        raise AssertionError("FEvent.dat was parsed")
+
+    with monkeypatch.context() as context:
+        context.setattr(mnllib.managers, "parse_fevent_chunk", fail_parsing)
+        cached_manager = mnllib.FEventScriptManager(cache_directory="cache")
+    assert cached_manager.fevent_offset_table == manager.fevent_offset_table
+    assert [
+        [type(chunk) for chunk in triple] for triple in cached_manager.fevent_chunks
+    ] == [[type(chunk) for chunk in triple] for triple in manager.fevent_chunks]
+    saved_file = io.BytesIO()
+    cached_manager.save_fevent(saved_file)
+    assert saved_file.getvalue() == data
+
+    typing.cast(mnllib.FEventScript, cached_manager.get_chunk(3)).subroutines[
+        0
+    ].commands.pop()
+    cached_manager.save_fevent()
+    cached_manager.save_overlay3()
+    reloaded_manager = mnllib.FEventScriptManager(cache_directory="cache")
+    assert (
+        len(
+            typing.cast(mnllib.FEventScript, reloaded_manager.get_chunk(3))
+            .subroutines[0]
+            .commands
+        )
+        == len(make_commands()) - 1
+    )
+
+
+def test_fevent_state_header(monkeypatch: pytest.MonkeyPatch) -> None:
+    file = io.BytesIO()
+    mnllib.write_fevent_state(file, bytes(16), [("state", 1)])
+    file.seek(0)
+    assert mnllib.read_fevent_state(file, bytes(16)) == [("state", 1)]
+    file.seek(0)
+    assert mnllib.read_fevent_state(file, b"\x01" * 16) is None
+
+    monkeypatch.setattr(
+        mnllib.state.marshal, "version", mnllib.state.marshal.version + 1
+    )
+    file.seek(0)
+    assert mnllib.read_fevent_state(file, bytes(16)) is None
+
+
+def test_iter_fevent_chunks(manager: mnllib.FEventScriptManager) -> None:
+    fevent = io.BytesIO(make_fevent(manager, 2))
+    overlay3, overlay6 = make_overlays(manager)
+
+    chunks = list(mnllib.iter_fevent_chunks(overlay3, overlay6, fevent))
+    assert [(index, type(chunk)) for index, chunk in chunks] == [
+        (0, mnllib.FEventScript),
+        (2, mnllib.LanguageTable),
+        (3, mnllib.FEventScript),
+        (5, mnllib.LanguageTable),
+        (6, mnllib.FEventScript),
+    ]
+    assert chunks[2][1].to_bytes(manager) == make_fevent_script().to_bytes(manager)
+
+    assert [
+        index
+        for index, _ in mnllib.iter_fevent_chunks(
+            overlay3,
+            overlay6,
+            fevent,
+            lambda index, data: mnllib.is_fevent_language_table(data),
+        )
+    ] == [2, 5]
+
+
+def test_load_from_buffers(
+    manager: mnllib.FEventScriptManager, tmp_path: pathlib.Path
+) -> None:
+    fevent = io.BytesIO(make_fevent(manager))
+    overlay3, overlay6 = make_overlays(manager)
+    (tmp_path / "overlay3.bin").write_bytes(overlay3.getvalue())
+    (tmp_path / "overlay6.bin").write_bytes(overlay6.getvalue())
+
+    files: list[
+        tuple[typing.BinaryIO | str | bytes, typing.BinaryIO | str | bytearray]
+    ] = [
+        (str(tmp_path / "overlay3.bin"), str(tmp_path / "overlay6.bin")),
+        (overlay3.getvalue(), bytearray(overlay6.getvalue())),
+        (overlay3, overlay6),
+    ]
+    loaded_manager = mnllib.FEventScriptManager(load=False)
+    for overlay3_file, overlay6_file in files:
+        loaded_manager = mnllib.FEventScriptManager(load=False)
+        loaded_manager.load_overlay3(overlay3_file)
+        loaded_manager.load_overlay6(overlay6_file)
+        assert loaded_manager.fevent_offset_table == manager.fevent_offset_table
+        assert loaded_manager.fevent_footer_offset == manager.fevent_footer_offset
+        assert [
+            metadata.to_bytes()
+            for metadata in loaded_manager.command_parameter_metadata_table
+        ] == [
+            metadata.to_bytes() for metadata in manager.command_parameter_metadata_table
+        ]
+
+    with (
+        open(tmp_path / "overlay6.bin", "rb") as file,
+        mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapping,
+    ):
+        loaded_manager.load_overlay6(mapping)
+    loaded_manager.load_fevent(fevent.getvalue())
+    assert loaded_manager.fevent_footer == b"footer"
+    saved_file = io.BytesIO()
+    loaded_manager.save_fevent(saved_file)
+    assert saved_file.getvalue() == fevent.getvalue()
+
+    (tmp_path / "FEvent.dat").write_bytes(fevent.getvalue())
+    for lazy in [False, True]:
+        with (
+            open(tmp_path / "FEvent.dat", "rb") as file,
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapping,
+        ):
+            loaded_manager.load_fevent(mapping, lazy)
+        saved_file = io.BytesIO()
+        loaded_manager.save_fevent(saved_file)
+        assert saved_file.getvalue() == fevent.getvalue()
+
+    data = bytearray(fevent.getvalue())
+    loaded_manager.load_fevent(data, lazy=True)
+    data[:] = bytes(len(data))
+    data.append(0)
+    saved_file = io.BytesIO()
+    loaded_manager.save_fevent(saved_file)
+    assert saved_file.getvalue() == fevent.getvalue()
+
+
+def test_patch_overlays(
+    manager: mnllib.FEventScriptManager, tmp_path: pathlib.Path
+) -> None:
+    manager.fevent_offset_table = [(0, 0, 0), (0, 0, 0)]
+    manager.fevent_footer_offset = 0
+    overlay3, overlay6 = make_overlays(manager)
+    for overlay in [overlay3, overlay6]:
+        overlay.seek(0, io.SEEK_END)
+        overlay.write(b"trailing data")
+
+    recording_overlay6 = RecordingBytesIO()
+    recording_overlay6.write(overlay6.getvalue())
+    recording_overlay6.write_sizes.clear()
+    manager.save_overlay6(recording_overlay6)
+    assert recording_overlay6.write_sizes == []
+    manager.command_parameter_metadata_table[0x0002] = mnllib.CommandParameterMetadata(
+        True, [0x2]
+    )
+    manager.save_overlay6(recording_overlay6)
+    assert len(recording_overlay6.write_sizes) == 1
+    assert recording_overlay6.write_sizes[0] <= 16
+    loaded_manager = mnllib.FEventScriptManager(load=False)
+    loaded_manager.load_overlay6(recording_overlay6.getvalue())
+    assert loaded_manager.command_parameter_metadata_table[0x0002].to_bytes() == (
+        manager.command_parameter_metadata_table[0x0002].to_bytes()
+    )
+    assert recording_overlay6.getvalue().endswith(b"trailing data")
+
+    manager.fevent_offset_table.append((1, 2, 3))
+    manager.fevent_footer_offset = 4
+    (tmp_path / "overlay3.bin").write_bytes(overlay3.getvalue())
+    for atomic in [False, True]:
+        manager.save_overlay3(str(tmp_path / "overlay3.bin"), atomic=atomic)
+        loaded_manager.load_overlay3(str(tmp_path / "overlay3.bin"))
+        assert loaded_manager.fevent_offset_table == manager.fevent_offset_table
+        assert loaded_manager.fevent_footer_offset == 4
+        assert (tmp_path / "overlay3.bin").read_bytes().endswith(b"trailing data")
+    assert [path.name for path in tmp_path.iterdir()] == ["overlay3.bin"]
+
+    with pytest.raises(ValueError, match="atomic"):
+        manager.save_overlay3(overlay3, atomic=True)